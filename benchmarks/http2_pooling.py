@@ -0,0 +1,58 @@
+"""
+Benchmark: HTTP/2 multiplexing vs. HTTP/1.1 connection pooling
+
+Fans out concurrent Devices.get_devices_apps_async calls against a local
+TLS test server (see server.py) once with the default HTTP/1.1 pool and
+once with http2=True, using the same connection limits, and reports the
+throughput and the number of connections the server had to accept.
+
+Usage:
+    python benchmarks/http2_pooling.py [--requests 2000] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from httpx import Limits
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from pyws1uem import WorkspaceOneAPI  # noqa: E402
+from server import BenchmarkServer  # noqa: E402
+
+
+async def run(env: str, http2: bool, requests: int, limits: Limits) -> float:
+    async with WorkspaceOneAPI(env, 'apikey', 'user', 'password', verify=False, limits=limits, http2=http2) as api:  # noqa: E501
+        # warm up the pool so connection setup is not part of the measurement
+        await api.devices.get_devices_apps_async(0)
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            api.devices.get_devices_apps_async(device_id)
+            for device_id in range(requests)
+        ])
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--max-connections', type=int, default=10)
+    args = parser.parse_args()
+
+    limits = Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)  # noqa: E501
+    print(f'{args.requests} concurrent requests, {args.latency * 1000:.0f} ms server latency, max_connections={args.max_connections}')  # noqa: E501
+    print(f'{"mode":<10}{"seconds":>10}{"req/s":>12}{"connections":>14}')
+    with BenchmarkServer(latency=args.latency) as server:
+        for name, http2 in (('HTTP/1.1', False), ('HTTP/2', True)):
+            server.reset()
+            elapsed = asyncio.run(run(server.env, http2, args.requests, limits))  # noqa: E501
+            connections = sum(server.connections.values())
+            print(f'{name:<10}{elapsed:>10.2f}{args.requests / elapsed:>12.0f}{connections:>14}')  # noqa: E501
+
+
+if __name__ == '__main__':
+    main()
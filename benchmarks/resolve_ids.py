@@ -0,0 +1,88 @@
+"""
+Benchmark: batch alternate id resolution vs. a loop of single lookups
+
+Maps a list of serial numbers (with duplicates and unknown serials)
+to DeviceIDs against the local test server (see server.py), once with
+a loop over Devices.get_id_by_alt_id and once with Devices.resolve_ids
+and resolve_ids_async, and reports the throughput.
+
+Usage:
+    python benchmarks/resolve_ids.py [--serials 2000] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from pyws1uem import WorkspaceOneAPI  # noqa: E402
+from server import BenchmarkServer  # noqa: E402
+
+
+def handler(method: str, path: str, params: Dict[str, str]):
+    serial = params.get('id', '')
+    if not serial.startswith('C02X'):
+        # unknown devices are answered without content
+        return 204, None
+    return 200, {'Id': {'Value': int(serial[4:])}, 'SerialNumber': serial}
+
+
+def loop(env: str, serials) -> float:
+    with WorkspaceOneAPI(env, 'apikey', 'user', 'password', verify=False) as api:  # noqa: E501
+        start = time.perf_counter()
+        for serial in serials:
+            api.devices.get_id_by_alt_id(serialnumber=serial)
+        return time.perf_counter() - start
+
+
+def batch(env: str, serials, concurrency: int) -> float:
+    with WorkspaceOneAPI(env, 'apikey', 'user', 'password', verify=False) as api:  # noqa: E501
+        start = time.perf_counter()
+        api.devices.resolve_ids(serialnumbers=serials, concurrency=concurrency)  # noqa: E501
+        return time.perf_counter() - start
+
+
+async def batch_async(env: str, serials, concurrency: int) -> float:
+    async with WorkspaceOneAPI(env, 'apikey', 'user', 'password', verify=False) as api:  # noqa: E501
+        start = time.perf_counter()
+        await api.devices.resolve_ids_async(serialnumbers=serials, concurrency=concurrency)  # noqa: E501
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--serials', type=int, default=2000)
+    parser.add_argument('--duplicates', type=float, default=0.2)
+    parser.add_argument('--unknown', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    random.seed(0)
+    serials = [
+        f'UNKNOWN{i}' if random.random() < args.unknown else f'C02X{i}'
+        for i in range(int(args.serials * (1 - args.duplicates)))
+    ]
+    serials += random.choices(serials, k=args.serials - len(serials))
+    random.shuffle(serials)
+
+    print(f'{len(serials)} serials ({len(set(serials))} distinct), {args.latency * 1000:.0f} ms server latency, concurrency={args.concurrency}')  # noqa: E501
+    print(f'{"mode":<20}{"seconds":>10}{"ids/s":>12}{"requests":>10}')
+    with BenchmarkServer(handler=handler, latency=args.latency) as server:
+        for name, run in (
+            ('get_id_by_alt_id', lambda: loop(server.env, serials)),
+            ('resolve_ids', lambda: batch(server.env, serials, args.concurrency)),  # noqa: E501
+            ('resolve_ids_async', lambda: asyncio.run(batch_async(server.env, serials, args.concurrency))),  # noqa: E501
+        ):
+            server.reset()
+            elapsed = run()
+            print(f'{name:<20}{elapsed:>10.2f}{len(serials) / elapsed:>12.0f}{server.requests:>10}')  # noqa: E501
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Local stand-in for a WorkspaceONE UEM API server used by the benchmarks.
+
+The server speaks TLS with a throw-away self-signed certificate
+(generated with the openssl command line tool) and negotiates
+HTTP/2 or HTTP/1.1 via ALPN, so the same server can be used to compare
+both protocol versions. Every request is answered by a handler function
+after an optional artificial latency that simulates the server work.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import ssl
+import tempfile
+import threading
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import h11
+import h2.config
+import h2.connection
+import h2.events
+
+Handler = Callable[[str, str, Dict[str, str]], Tuple[int, object]]
+
+
+def _default_handler(method: str, path: str, params: Dict[str, str]):
+    return 200, {'Id': {'Value': 1}, 'Path': path}
+
+
+class BenchmarkServer(object):
+    """
+    TLS server answering HTTP/1.1 and HTTP/2 requests in a background thread
+
+    Use as a context manager, the base url to pass as `env` to the
+    WorkspaceOneAPI is available as `env` once the server is started.
+    """
+
+    def __init__(self, handler: Handler = _default_handler, latency: float = 0.0):  # noqa: E501
+        self.handler = handler
+        self.latency = latency
+        self.connections: Dict[str, int] = {'h2': 0, 'http/1.1': 0}
+        self.requests = 0
+        self.env = ''
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)  # noqa: E501
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def __enter__(self) -> "BenchmarkServer":
+        ssl_context = self._ssl_context()
+        self._thread.start()
+        server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._serve, '127.0.0.1', 0, ssl=ssl_context),  # noqa: E501
+            self._loop
+        ).result()
+        self._server = server
+        port = server.sockets[0].getsockname()[1]
+        self.env = f'127.0.0.1:{port}'
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._tmpdir.cleanup()
+
+    def reset(self) -> None:
+        self.connections = {'h2': 0, 'http/1.1': 0}
+        self.requests = 0
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        cert = os.path.join(self._tmpdir.name, 'cert.pem')
+        key = os.path.join(self._tmpdir.name, 'key.pem')
+        subprocess.run(
+            [
+                'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                '-keyout', key, '-out', cert, '-days', '1',
+                '-subj', '/CN=localhost'
+            ],
+            check=True,
+            capture_output=True
+        )
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        context.set_alpn_protocols(['h2', 'http/1.1'])
+        return context
+
+    async def _respond(self, method: str, target: str) -> Tuple[int, bytes]:  # noqa: E501
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        url = urlsplit(target)
+        self.requests += 1
+        status, body = self.handler(method, url.path, dict(parse_qsl(url.query)))  # noqa: E501
+        if body is None:
+            # answered without content, e.g. 204
+            return status, b''
+        return status, json.dumps(body).encode('utf-8')
+
+    async def _serve(self, reader, writer) -> None:
+        protocol = writer.get_extra_info('ssl_object').selected_alpn_protocol()  # noqa: E501
+        protocol = protocol or 'http/1.1'
+        self.connections[protocol] += 1
+        try:
+            if protocol == 'h2':
+                await self._serve_h2(reader, writer)
+            else:
+                await self._serve_h11(reader, writer)
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h11(self, reader, writer) -> None:
+        conn = h11.Connection(h11.SERVER)
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                data = await reader.read(65536)
+                conn.receive_data(data)
+                if not data:
+                    return
+                continue
+            if isinstance(event, h11.ConnectionClosed):
+                return
+            if isinstance(event, h11.Request):
+                method = event.method.decode()
+                target = event.target.decode()
+                continue
+            if isinstance(event, h11.EndOfMessage):
+                status, body = await self._respond(method, target)
+                headers = [
+                    ('Content-Type', 'application/json; charset=utf-8'),
+                    ('Content-Length', str(len(body))),
+                ] if body else []
+                writer.write(conn.send(h11.Response(status_code=status, headers=headers)))  # noqa: E501
+                if body:
+                    writer.write(conn.send(h11.Data(data=body)))
+                writer.write(conn.send(h11.EndOfMessage()))
+                await writer.drain()
+                if conn.our_state is h11.MUST_CLOSE:
+                    return
+                conn.start_next_cycle()
+
+    async def _serve_h2(self, reader, writer) -> None:
+        config = h2.config.H2Configuration(client_side=False, header_encoding='utf-8')  # noqa: E501
+        conn = h2.connection.H2Connection(config=config)
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        pending: List[asyncio.Task] = []
+        requests: Dict[int, Tuple[str, str]] = {}
+
+        async def answer(stream_id: int, method: str, target: str):
+            status, body = await self._respond(method, target)
+            if not body:
+                conn.send_headers(stream_id, [(':status', str(status))], end_stream=True)  # noqa: E501
+            else:
+                conn.send_headers(stream_id, [
+                    (':status', str(status)),
+                    ('content-type', 'application/json; charset=utf-8'),
+                    ('content-length', str(len(body))),
+                ])
+                conn.send_data(stream_id, body, end_stream=True)
+            writer.write(conn.data_to_send())
+            await writer.drain()
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = dict(event.headers)
+                    requests[event.stream_id] = (headers[':method'], headers[':path'])  # noqa: E501
+                elif isinstance(event, h2.events.StreamEnded):
+                    method, target = requests.pop(event.stream_id)
+                    pending.append(asyncio.ensure_future(answer(event.stream_id, method, target)))  # noqa: E501
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    writer.write(conn.data_to_send())
+                    return
+            writer.write(conn.data_to_send())
+            await writer.drain()
+        for task in pending:
+            task.cancel()
@@ -1,3 +1,11 @@
 from pyws1uem.api import WorkspaceOneAPI
+from pyws1uem.cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend, ValidatorCache  # noqa: E501
 from pyws1uem.error import WorkspaceOneAPIError
-__all__ = ['WorkspaceOneAPI', 'WorkspaceOneAPIError']
+from pyws1uem.ratelimit import RateLimiter
+from pyws1uem.records import DeviceRecord
+from pyws1uem.retry import RetryPolicy
+__all__ = [
+    'WorkspaceOneAPI', 'WorkspaceOneAPIError', 'DeviceRecord', 'RateLimiter',
+    'RetryPolicy', 'ResponseCache', 'ValidatorCache', 'MemoryCacheBackend',
+    'SQLiteCacheBackend'
+]
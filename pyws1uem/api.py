@@ -1,9 +1,15 @@
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Union
 from pyws1uem.system import Info, Users, Groups
 from pyws1uem.mdm import Smartgroups, Tags, Devices, Profiles
 from pyws1uem.mam import Apps
+from pyws1uem.bulk import BulkResult
+from pyws1uem.cache import ResponseCache, ValidatorCache
 from pyws1uem.client import Client
+from pyws1uem.ratelimit import RateLimiter
+from pyws1uem.retry import RetryPolicy
+from httpx import Limits
 from httpx._types import VerifyTypes, TimeoutTypes
-from httpx._config import DEFAULT_TIMEOUT_CONFIG
+from httpx._config import DEFAULT_LIMITS, DEFAULT_TIMEOUT_CONFIG
 
 
 class WorkspaceOneAPI(object):
@@ -15,10 +21,21 @@ class WorkspaceOneAPI(object):
         self,
         env: str,
         apikey: str,
-        username: str,
-        password: str,
+        username: str = "",
+        password: str = "",
         verify: VerifyTypes = "",
-        timeout: TimeoutTypes = DEFAULT_TIMEOUT_CONFIG
+        timeout: TimeoutTypes = DEFAULT_TIMEOUT_CONFIG,
+        limits: Limits = DEFAULT_LIMITS,
+        http2: bool = False,
+        client_id: str = "",
+        client_secret: str = "",
+        token_url: str = "",
+        token_cache_path: str = "",
+        rate_limiter: Union[RateLimiter, None] = None,
+        retry_policy: Union[RetryPolicy, None] = None,
+        coalesce: bool = False,
+        response_cache: Union[ResponseCache, None] = None,
+        validator_cache: Union[ValidatorCache, None] = None
     ):
         """
         Initialize an AirWatchAPI Client Object.
@@ -28,8 +45,43 @@ class WorkspaceOneAPI(object):
                 username: Admin username
                 password: corresponding pasword
                 verify: manual SSL certificat
+                timeout: default timeout of the requests
+                limits: connection pool limits of the underlying client
+                http2: enable HTTP/2 multiplexing (requires 'h2')
+                client_id: OAuth client id, enables OAuth authentication
+                client_secret: OAuth client secret
+                token_url: OAuth token endpoint of the UEM region
+                token_cache_path: file to share the OAuth token
+                                  between processes
+                rate_limiter: paces the requests to stay within
+                              the API rate limit
+                retry_policy: retries failed requests with backoff
+                coalesce: share one request between concurrent
+                          identical GET requests
+                response_cache: caches the responses of GET requests
+                                (see ResponseCache)
+                validator_cache: revalidates GET responses with
+                                 ETag / Last-Modified (see ValidatorCache)
         """
-        self.client = Client(env, apikey, username, password, verify=verify, timeout=timeout)  # noqa: E501
+        self.client = Client(
+            env,
+            apikey,
+            username,
+            password,
+            verify=verify,
+            timeout=timeout,
+            limits=limits,
+            http2=http2,
+            client_id=client_id,
+            client_secret=client_secret,
+            token_url=token_url,
+            token_cache_path=token_cache_path,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            coalesce=coalesce,
+            response_cache=response_cache,
+            validator_cache=validator_cache
+        )
         self.groups = Groups(self.client)
         self.devices = Devices(self.client)
         self.smartgroups = Smartgroups(self.client)
@@ -38,3 +90,57 @@ class WorkspaceOneAPI(object):
         self.tags = Tags(self.client)
         self.apps = Apps(self.client)
         self.profiles = Profiles(self.client)
+
+    def bulk(
+        self,
+        func: Callable[..., Any],
+        items: Iterable[Any],
+        concurrency: int = 10,
+        ordered: bool = True
+    ) -> Iterator[BulkResult]:
+        """
+        Runs func for every item with a bounded concurrency
+        and yields a BulkResult per item, see Client.map
+
+        Example:
+            for result in wso.bulk(wso.devices.get_details_by_device_id, device_ids):
+                print(result.item, result.result if result.ok else result.error)
+        """  # noqa: E501
+        return self.client.map(func, items, concurrency=concurrency, ordered=ordered)  # noqa: E501
+
+    def bulk_async(
+        self,
+        func: Callable[..., Any],
+        items: Iterable[Any],
+        concurrency: int = 10,
+        ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        """
+        The same as bulk but async, for the *_async methods
+        """
+        return self.client.async_map(func, items, concurrency=concurrency, ordered=ordered)  # noqa: E501
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections of the underlying client
+        """
+        self.client.close()
+
+    def __enter__(self) -> "WorkspaceOneAPI":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled connections of the underlying client,
+        including the async pool of the running event loop
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "WorkspaceOneAPI":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
@@ -0,0 +1,254 @@
+"""
+OAuth Module
+
+Implements the OAuth client credentials flow of WorkspaceONE UEM
+as an httpx authentication class.
+
+The access token is cached in memory and, optionally, in a file on disk.
+The file cache is guarded by a file lock, so parallel worker processes
+using the same cache file share one token instead of each requesting
+their own.
+Tokens are refreshed in the background shortly before they expire,
+so requests do not have to wait for a token request.
+"""
+
+import asyncio
+import json
+import os
+import time
+from threading import Lock, Thread
+from typing import Any, AsyncGenerator, Dict, Generator
+from httpx import Auth, Client as SyncClient, Request, Response
+from httpx._types import VerifyTypes, TimeoutTypes
+from httpx._config import DEFAULT_TIMEOUT_CONFIG
+
+from pyws1uem.error import WorkspaceOneAPIError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
+    import msvcrt
+
+
+class _FileLock(object):
+    """
+    Exclusive inter-process lock on a lock file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = -1
+
+    def __enter__(self) -> "_FileLock":
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:  # pragma: no cover - windows
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *args) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:  # pragma: no cover - windows
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = -1
+
+
+class OAuthClientCredentials(Auth):
+    """
+    OAuth client credentials authentication for WorkspaceONE UEM
+
+    The token url depends on the region of the UEM tenant,
+    e.g. https://na.uemauth.vmwservices.com/connect/token
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        token_url: str,
+        cache_path: str = "",
+        refresh_margin: float = 300.0,
+        verify: VerifyTypes = True,
+        timeout: TimeoutTypes = DEFAULT_TIMEOUT_CONFIG
+    ):
+        """
+        Initialize the OAuth client credentials authentication
+
+        :param client_id: OAuth client id
+        :param client_secret: OAuth client secret
+        :param token_url: url of the token endpoint
+        :param cache_path: (optional) file to share the token
+                           between processes
+        :param refresh_margin: seconds before the expiry of the token
+                               from which on the token is refreshed
+        :param verify: SSL verification of the token endpoint
+        :param timeout: timeout of the token requests
+        """
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.verify = verify
+        self.timeout = timeout
+        self._token = ""
+        self._expires_at = 0.0
+        self._rejected = ""
+        self._lock = Lock()
+        self._refreshing = False
+
+    @property
+    def _cache_key(self) -> str:
+        return f"{self.token_url}|{self.client_id}"
+
+    def get_token(self) -> str:
+        """
+        Returns a valid access token.
+        Only blocks when no valid token is available at all,
+        a token close to its expiry is refreshed in the background.
+        """
+        now = time.time()
+        if self._token and now < self._expires_at - self.refresh_margin:
+            return self._token
+        if self._token and now < self._expires_at:
+            self._refresh_in_background()
+            return self._token
+        with self._lock:
+            if not self._token or time.time() >= self._expires_at:
+                self._refresh()
+            return self._token
+
+    async def async_get_token(self) -> str:
+        """
+        The same as get_token but async.
+        A blocking token request is run in the default executor.
+        """
+        if self._token and time.time() < self._expires_at:
+            return self.get_token()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_token)
+
+    def invalidate(self, token: str = "") -> None:
+        """
+        Discards the given (or the current) token,
+        e.g. after it was rejected by the API
+        """
+        with self._lock:
+            if not token or token == self._token:
+                self._rejected = self._token
+                self._token = ""
+                self._expires_at = 0.0
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing or not self._lock.acquire(blocking=False):
+            return
+        self._refreshing = True
+
+        def refresh():
+            try:
+                self._refresh(force=True)
+            except Exception:
+                # the current token is still valid, retried on next call
+                pass
+            finally:
+                self._refreshing = False
+                self._lock.release()
+
+        Thread(target=refresh, daemon=True).start()
+
+    def _refresh(self, force: bool = False) -> None:
+        """
+        Loads a token from the file cache or requests a new one.
+        Must be called with the lock held.
+        """
+        if not self.cache_path:
+            self._store(self._request_token())
+            return
+        with _FileLock(f"{self.cache_path}.lock"):
+            cached = self._read_cache().get(self._cache_key)
+            if (
+                isinstance(cached, dict) and
+                cached.get("access_token") != self._rejected and
+                (
+                    cached.get("access_token") != self._token or
+                    not force
+                ) and
+                time.time() < cached.get("expires_at", 0) - self.refresh_margin  # noqa: E501
+            ):
+                self._store(cached)
+                return
+            token = self._request_token()
+            self._store(token)
+            cache = self._read_cache()
+            cache[self._cache_key] = token
+            self._write_cache(cache)
+
+    def _store(self, token: Dict[str, Any]) -> None:
+        self._token = token["access_token"]
+        self._expires_at = float(token["expires_at"])
+
+    def _request_token(self) -> Dict[str, Any]:
+        """
+        Requests a new access token from the token endpoint
+        """
+        requested_at = time.time()
+        with SyncClient(verify=self.verify, timeout=self.timeout) as client:
+            response = client.post(
+                self.token_url,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
+        try:
+            json_response = response.json()
+        except ValueError:
+            json_response = {}
+        if response.status_code != 200 or "access_token" not in json_response:  # noqa: E501
+            raise WorkspaceOneAPIError(json_response={
+                "errorCode": response.status_code,
+                "message": json_response.get("error_description") or json_response.get("error") or response.text,  # noqa: E501
+            })
+        return {
+            "access_token": json_response["access_token"],
+            "expires_at": requested_at + float(json_response.get("expires_in", 3600)),  # noqa: E501
+        }
+
+    def _read_cache(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _write_cache(self, cache: Dict[str, Any]) -> None:
+        tmp_path = f"{self.cache_path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(tmp_path, self.cache_path)
+
+    def sync_auth_flow(self, request: Request) -> Generator[Request, Response, None]:  # noqa: E501
+        token = self.get_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            self.invalidate(token)
+            request.headers["Authorization"] = f"Bearer {self.get_token()}"
+            yield request
+
+    async def async_auth_flow(self, request: Request) -> AsyncGenerator[Request, Response]:  # noqa: E501
+        token = await self.async_get_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            self.invalidate(token)
+            request.headers["Authorization"] = f"Bearer {await self.async_get_token()}"  # noqa: E501
+            yield request
@@ -0,0 +1,148 @@
+"""
+Bulk Module
+
+Runs many API calls with a bounded concurrency, either on a thread pool
+(for the sync methods) or as asyncio tasks (for the async methods).
+
+Every item of the input is turned into one call of the given function:
+a tuple is passed as positional arguments, a dict as keyword arguments
+and any other value as the single positional argument.
+The results are streamed back as BulkResult objects, in input order or
+in completion order. Exceptions of single calls are captured in the
+result instead of aborting the whole batch.
+Only `concurrency` calls are in flight at a time and the input is
+consumed lazily, so arbitrarily large iterables can be processed.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait  # noqa: E501
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, Iterator, Set, Tuple, Union  # noqa: E501
+
+
+class BulkResult(object):
+    """
+    Result of a single call of a bulk run
+
+    :ivar index: position of the item in the input
+    :ivar item: the input item
+    :ivar result: the return value of the call
+    :ivar error: the exception raised by the call, None on success
+    """
+    __slots__ = ('index', 'item', 'result', 'error')
+
+    def __init__(self, index: int, item: Any, result: Any = None, error: Union[BaseException, None] = None):  # noqa: E501
+        self.index = index
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f'BulkResult(index={self.index}, item={self.item!r}, error={self.error!r})'  # noqa: E501
+        return f'BulkResult(index={self.index}, item={self.item!r}, result={self.result!r})'  # noqa: E501
+
+
+def _arguments(item: Any) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+    if isinstance(item, tuple):
+        return item, {}
+    if isinstance(item, dict):
+        return (), item
+    return (item,), {}
+
+
+def _call(func: Callable[..., Any], index: int, item: Any) -> BulkResult:
+    args, kwargs = _arguments(item)
+    try:
+        return BulkResult(index, item, result=func(*args, **kwargs))
+    except Exception as error:
+        return BulkResult(index, item, error=error)
+
+
+async def _async_call(func: Callable[..., Awaitable[Any]], index: int, item: Any) -> BulkResult:  # noqa: E501
+    args, kwargs = _arguments(item)
+    try:
+        return BulkResult(index, item, result=await func(*args, **kwargs))
+    except Exception as error:
+        return BulkResult(index, item, error=error)
+
+
+def map_threaded(
+    func: Callable[..., Any],
+    items: Iterable[Any],
+    concurrency: int = 10,
+    ordered: bool = True
+) -> Iterator[BulkResult]:
+    """
+    Calls a sync function for every item on a thread pool
+
+    :param func: function to call
+    :param items: call arguments, one item per call
+    :param concurrency: maximum number of calls in flight
+    :param ordered: yield in input order instead of completion order
+    """
+    source = enumerate(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: Deque[Future] = deque()
+        for index, item in source:
+            pending.append(executor.submit(_call, func, index, item))
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            if ordered:
+                done = pending.popleft()
+                yield done.result()
+                finished = 1
+            else:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for done in completed:
+                    pending.remove(done)
+                    yield done.result()
+                finished = len(completed)
+            for index, item in source:
+                pending.append(executor.submit(_call, func, index, item))
+                finished -= 1
+                if finished == 0:
+                    break
+
+
+async def map_async(
+    func: Callable[..., Awaitable[Any]],
+    items: Iterable[Any],
+    concurrency: int = 10,
+    ordered: bool = True
+) -> AsyncIterator[BulkResult]:
+    """
+    The same as map_threaded but for coroutine functions,
+    the calls run as tasks on the running event loop.
+    """
+    source = enumerate(items)
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        for index, item in source:
+            pending.append(asyncio.ensure_future(_async_call(func, index, item)))  # noqa: E501
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            if ordered:
+                yield await pending.popleft()
+                finished = 1
+            else:
+                completed: Set[asyncio.Task]
+                completed, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)  # noqa: E501
+                for done in completed:
+                    pending.remove(done)
+                    yield done.result()
+                finished = len(completed)
+            for index, item in source:
+                pending.append(asyncio.ensure_future(_async_call(func, index, item)))  # noqa: E501
+                finished -= 1
+                if finished == 0:
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
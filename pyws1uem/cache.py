@@ -0,0 +1,421 @@
+"""
+Cache Module
+
+Bounded in-process cache with LRU eviction and a time to live per entry,
+and the response and validator caches of the Client with in-memory and
+SQLite backends.
+"""
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+from urllib.parse import urlencode
+from httpx import Response
+
+# returned by TTLCache.get for missing and expired entries,
+# None is a valid (negative) cached value
+MISSING = object()
+
+
+class TTLCache(object):
+    """
+    Thread-safe LRU cache with a time to live per entry
+
+    Entries with the value None (negative results) expire after
+    negative_ttl seconds instead of ttl seconds.
+
+    The counters of the cache are available in `stats`:
+    hits, misses, evictions (LRU) and expirations.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600.0, negative_ttl: float = 60.0):  # noqa: E501
+        """
+        Initialize the TTLCache
+
+        :param maxsize: maximum number of entries
+        :param ttl: seconds an entry is valid
+        :param negative_ttl: seconds a None entry is valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}  # noqa: E501
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # noqa: E501
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of the lookups answered from the cache
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the cached value or MISSING
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return MISSING
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries
+        """
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Removes an entry
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:  # noqa: E501
+        """
+        Removes all entries for which predicate(key, value) is true
+
+        :return: number of removed entries
+        """
+        with self._lock:
+            keys = [
+                key for key, (_, value) in self._entries.items()
+                if predicate(key, value)
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Removes all entries
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+def _resource(url: str) -> Tuple[str, str]:
+    """
+    Returns the route (module and path without the api version)
+    and the resource (module and first path segment) of an endpoint url,
+    e.g. https://host/api/v2/mdm/profiles/12 -> mdm/profiles/12, mdm/profiles
+    """
+    route = url.split("/api/", 1)[-1].split("?", 1)[0].strip("/")
+    segments = route.split("/")
+    if len(segments) > 1 and segments[0][:1] == "v" and segments[0][1:].isdigit():  # noqa: E501
+        segments = segments[1:]
+    return "/".join(segments), "/".join(segments[:2])
+
+
+def _cache_key(url: str, params: Any, accept: str) -> str:
+    if isinstance(params, dict):
+        params = urlencode(sorted((str(name), str(value)) for name, value in params.items()))  # noqa: E501
+    elif isinstance(params, bytes):
+        params = params.decode()
+    return f"{url}?{params or ''}|{accept or ''}"
+
+
+class MemoryCacheBackend(object):
+    """
+    In-memory LRU storage of a ResponseCache
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        :param maxsize: maximum number of cached responses
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()  # noqa: E501
+        self._lock = Lock()
+
+    def get(self, key: str) -> Union[Tuple[float, str], None]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[2]
+
+    def set(self, key: str, resource: str, expires_at: float, body: str) -> None:  # noqa: E501
+        with self._lock:
+            self._entries[key] = (expires_at, resource, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_resource(self, resource: str) -> int:
+        with self._lock:
+            keys = [
+                key for key, (_, entry_resource, _) in self._entries.items()
+                if entry_resource == resource
+            ]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend(object):
+    """
+    On-disk storage of a ResponseCache in a SQLite database,
+    can be shared between processes
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: SQLite database file
+        """
+        self.path = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    resource TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    body TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS responses_resource
+                    ON responses (resource);
+            """)
+
+    def get(self, key: str) -> Union[Tuple[float, str], None]:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT expires_at, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def set(self, key: str, resource: str, expires_at: float, body: str) -> None:  # noqa: E501
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, resource, expires_at, body)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))  # noqa: E501
+
+    def delete_resource(self, resource: str) -> int:
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM responses WHERE resource = ?", (resource,)
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache(object):
+    """
+    Cache of the responses of GET requests with TTLs per route
+
+    Only routes with a TTL are cached. A route TTL applies to all
+    routes starting with it (the longest matching route wins),
+    routes are given as module and path, e.g. "system/info" or
+    "mdm/profiles". Every write request (POST, PUT, PATCH, DELETE)
+    sent by the Client invalidates the cached responses of its
+    resource, the module and the first path segment
+    (e.g. a POST to mdm/tags/12/adddevices invalidates mdm/tags/...).
+
+    Cached bodies are stored as json and decoded on every hit,
+    callers never share the returned objects.
+    The counters are available in `stats`:
+    hits, misses, stores and invalidations.
+    """
+
+    def __init__(
+        self,
+        backend: Union[MemoryCacheBackend, SQLiteCacheBackend, None] = None,
+        ttl: float = 0.0,
+        route_ttls: Union[Dict[str, float], None] = None
+    ):
+        """
+        Initialize the ResponseCache
+
+        :param backend: storage of the responses,
+                        MemoryCacheBackend by default
+        :param ttl: seconds responses of routes without
+                    a route TTL are cached, 0 to not cache them
+        :param route_ttls: seconds responses are cached per route
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()  # noqa: E501
+        self.ttl = ttl
+        self.route_ttls = {
+            route.strip("/"): route_ttl
+            for route, route_ttl in (route_ttls or {}).items()
+        }
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}  # noqa: E501
+        self._generations: Dict[str, int] = {}
+
+    def route_ttl(self, route: str) -> float:
+        """
+        Returns the TTL of a route
+        """
+        best = ""
+        ttl = self.ttl
+        for prefix, prefix_ttl in self.route_ttls.items():
+            if (
+                len(prefix) >= len(best) and
+                (route == prefix or route.startswith(prefix + "/"))
+            ):
+                best, ttl = prefix, prefix_ttl
+        return ttl
+
+    def lookup(self, url: str, params: Any, accept: str) -> Tuple[Any, str, int]:  # noqa: E501
+        """
+        Returns the cached response of a GET request (or MISSING),
+        the cache key and the generation of its resource to pass to store
+        """
+        route, resource = _resource(url)
+        generation = self._generations.get(resource, 0)
+        if self.route_ttl(route) <= 0:
+            return MISSING, "", generation
+        key = _cache_key(url, params, accept)
+        entry = self.backend.get(key)
+        if entry is not None:
+            expires_at, body = entry
+            if time.time() < expires_at:
+                self.stats["hits"] += 1
+                return json.loads(body), key, generation
+            self.backend.delete(key)
+        self.stats["misses"] += 1
+        return MISSING, key, generation
+
+    def store(self, url: str, key: str, generation: int, response: Any) -> None:  # noqa: E501
+        """
+        Stores the response of a GET request looked up before,
+        unless its resource was written in the meantime
+        """
+        if not key:
+            return
+        route, resource = _resource(url)
+        if self._generations.get(resource, 0) != generation:
+            return
+        self.backend.set(key, resource, time.time() + self.route_ttl(route), json.dumps(response))  # noqa: E501
+        self.stats["stores"] += 1
+
+    def invalidate(self, url: str) -> None:
+        """
+        Drops the cached responses of the resource of an url
+        """
+        _, resource = _resource(url)
+        self._generations[resource] = self._generations.get(resource, 0) + 1
+        self.stats["invalidations"] += self.backend.delete_resource(resource)
+
+    def clear(self) -> None:
+        """
+        Drops all cached responses
+        """
+        self.backend.clear()
+
+
+class ValidatorCache(object):
+    """
+    Stores the validators (ETag, Last-Modified) and bodies of GET
+    responses to revalidate them with conditional requests
+
+    GET requests for a stored url are sent with If-None-Match and
+    If-Modified-Since; a 304 Not Modified response is answered with
+    the stored body. The counters are available in `stats`:
+    conditional (requests sent with validators), not_modified (304)
+    and stores.
+    """
+
+    def __init__(self, backend: Union[MemoryCacheBackend, SQLiteCacheBackend, None] = None):  # noqa: E501
+        """
+        Initialize the ValidatorCache
+
+        :param backend: storage of the validators and bodies,
+                        MemoryCacheBackend by default
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()  # noqa: E501
+        self.stats: Dict[str, int] = {"conditional": 0, "not_modified": 0, "stores": 0}  # noqa: E501
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of the conditional requests answered with 304
+        """
+        conditional = self.stats["conditional"]
+        return self.stats["not_modified"] / conditional if conditional else 0.0  # noqa: E501
+
+    def prepare(self, url: str, params: Any, headers: Dict[str, str]) -> Tuple[str, Dict[str, str], Union[Dict[str, str], None]]:  # noqa: E501
+        """
+        Returns the cache key, the request headers including the
+        validators of the stored response and the stored response
+        """
+        key = _cache_key(url, params, headers.get("Accept", ""))
+        entry = self.backend.get(key)
+        if entry is None:
+            return key, headers, None
+        stored = json.loads(entry[1])
+        headers = dict(headers)
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        self.stats["conditional"] += 1
+        return key, headers, stored
+
+    def complete(self, url: str, key: str, stored: Union[Dict[str, str], None], response: Response) -> Response:  # noqa: E501
+        """
+        Returns the response to use for a GET request:
+        a 304 is replaced by the stored response,
+        a response with validators is stored
+        """
+        if response.status_code == 304 and stored is not None:
+            self.stats["not_modified"] += 1
+            return Response(
+                200,
+                headers={"Content-Type": stored["content_type"]},
+                content=stored["body"].encode("utf-8"),
+                request=response.request,
+            )
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            _, resource = _resource(url)
+            self.backend.set(key, resource, float("inf"), json.dumps({
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": response.headers.get("Content-Type", ""),
+                "body": response.text,
+            }))
+            self.stats["stores"] += 1
+        return response
@@ -10,15 +10,26 @@ using the WorkspaceOneAPIError Class.
 """
 
 from __future__ import print_function, absolute_import
+import asyncio
+import time
 from base64 import b64encode
-from typing import Any, Dict, List, Union
+from threading import Lock
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple, Union  # noqa: E501
+from weakref import WeakKeyDictionary
 from http.client import HTTPConnection
-from httpx import AsyncClient, Client as SyncClient, Response
+from httpx import AsyncClient, Client as SyncClient, Limits, Response, TransportError  # noqa: E501
 from httpx._types import VerifyTypes, TimeoutTypes
 from httpx._client import UseClientDefault, USE_CLIENT_DEFAULT
-from httpx._config import DEFAULT_TIMEOUT_CONFIG
+from httpx._config import DEFAULT_LIMITS, DEFAULT_TIMEOUT_CONFIG
 
+from pyws1uem.auth import OAuthClientCredentials
+from pyws1uem.bulk import BulkResult, map_async, map_threaded
+from pyws1uem.cache import MISSING, ResponseCache, ValidatorCache
+from pyws1uem.coalesce import SingleFlight, request_key
 from pyws1uem.error import WorkspaceOneAPIError
+from pyws1uem.ratelimit import RateLimiter
+from pyws1uem.retry import RetryPolicy
+from pyws1uem.stream import JsonArrayStream
 
 # Enabling debugging at http.client level (requests->urllib3->http.client)
 # you will see the REQUEST, including HEADERS and DATA, and RESPONSE with
@@ -34,6 +45,54 @@ SerializableType = Union[
 ]
 RestResponseType = Union[SerializableType, int]
 
+# API versions requested via "Accept: application/json;version=N"
+# by the endpoint modules, their headers are prepared with the client
+_ACCEPT_VERSIONS = ("1", "2", "3", "4")
+_HEADER_CACHE_SIZE = 64
+# methods that do not change the resources of the API
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+_JSON_CONTENT_TYPES = (
+    "application/json",
+    "application/json; charset=utf-8",
+)
+
+
+def _status_error(status: int) -> WorkspaceOneAPIError:
+    """
+    Returns the error of an unsuccessful response without json
+    """
+    return WorkspaceOneAPIError(json_response={
+        "errorCode": status,
+        "message": f"HTTP status {status}",
+    })
+
+
+def _is_success(response: RestResponseType) -> bool:
+    """
+    True unless the response is the status code returned by
+    _check_for_error for an unsuccessful response without json
+    """
+    return not (type(response) is int and not 200 <= response < 300)
+
+
+def _raise_for_status(response: RestResponseType) -> RestResponseType:
+    """
+    Raises a WorkspaceOneAPIError for the status code returned
+    by _check_for_error for an unsuccessful response without json,
+    returns the other responses unchanged
+    """
+    if not _is_success(response):
+        raise _status_error(response)
+    return response
+
+
+def _is_not_found(error: BaseException) -> bool:
+    """
+    True if the error is the not found answer of the API
+    """
+    return isinstance(error, WorkspaceOneAPIError) and error.error_code == 404  # noqa: E501
+
+
 # TODO: programing using library should be able to set logging level
 # TODO: Implement logging to using config
 # https://docs.python.org/3/howto/logging.html#configuring-logging
@@ -55,19 +114,63 @@ class Client(object):
         self,
         env: str,
         apikey: str,
-        username: str,
-        password: str,
+        username: str = "",
+        password: str = "",
         verify: VerifyTypes = "",
-        timeout: TimeoutTypes = DEFAULT_TIMEOUT_CONFIG
+        timeout: TimeoutTypes = DEFAULT_TIMEOUT_CONFIG,
+        limits: Limits = DEFAULT_LIMITS,
+        http2: bool = False,
+        client_id: str = "",
+        client_secret: str = "",
+        token_url: str = "",
+        token_cache_path: str = "",
+        rate_limiter: Union[RateLimiter, None] = None,
+        retry_policy: Union[RetryPolicy, None] = None,
+        coalesce: bool = False,
+        response_cache: Union[ResponseCache, None] = None,
+        validator_cache: Union[ValidatorCache, None] = None
     ):
         """
         Initialize an AirWatchAPI Client Object.
 
+        The Client keeps one pooled HTTP connection pool open for its
+        whole lifetime, so connections (and TLS sessions) are reused
+        between calls. Call close() or use the Client as a context manager
+        to release the pooled connections.
+        The async methods share one pooled AsyncClient per event loop,
+        which is created lazily on first use and released by aclose()
+        or by using the Client as an async context manager.
+        With http2 enabled, concurrent requests are multiplexed over
+        the pooled connections when the server negotiates HTTP/2
+        (requires the optional 'h2' package: pip install pyws1uem[http2]).
+        If a client_id is given, the client authenticates with OAuth
+        client credentials instead of Basic authentication.
+
         :param  env: Base URL of the AirWatch API Service
                 apikey: API Key to authorize
                 username: Admin username
                 password: corresponding pasword
                 verify: manual SSL certificate
+                timeout: default timeout of the requests
+                limits: connection pool limits of the sync and async pools
+                        (max_connections, max_keepalive_connections,
+                        keepalive_expiry)
+                http2: enable HTTP/2 support
+                client_id: OAuth client id
+                client_secret: OAuth client secret
+                token_url: OAuth token endpoint of the UEM region
+                token_cache_path: file to share the OAuth token
+                                  between processes
+                rate_limiter: paces the sync and async requests
+                              to stay within the API rate limit
+                retry_policy: retries failed requests with backoff
+                coalesce: send concurrent identical GET requests
+                          (same url, params and Accept header) only once
+                          and share the response
+                response_cache: caches the responses of GET requests,
+                                invalidated by the write requests
+                validator_cache: revalidates the responses of GET
+                                 requests with ETag / Last-Modified
         """
         self.env = env
         self.apikey = apikey
@@ -75,6 +178,134 @@ class Client(object):
         self.password = password
         self.verify = verify
         self.timeout = timeout
+        self.limits = limits
+        self.http2 = http2
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.single_flight: Union[SingleFlight, None] = SingleFlight() if coalesce else None  # noqa: E501
+        self.response_cache = response_cache
+        self.validator_cache = validator_cache
+        self.oauth: Union[OAuthClientCredentials, None] = None
+        if client_id:
+            self.oauth = OAuthClientCredentials(
+                client_id,
+                client_secret,
+                token_url,
+                cache_path=token_cache_path,
+                verify=verify,
+                timeout=timeout
+            )
+        self._client = SyncClient(verify=self.verify, timeout=self.timeout, limits=self.limits, http2=self.http2, auth=self.oauth)  # noqa: E501
+        self._async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = WeakKeyDictionary()  # noqa: E501
+        self._async_clients_lock = Lock()
+        self._routes: Dict[Tuple[str, str], str] = {}
+        self._base_header = self._build_header(self.username, self.password, self.apikey)  # noqa: E501
+        if self.oauth is not None:
+            # the bearer token is set per request by the OAuth auth flow
+            del self._base_header["Authorization"]
+        self._header_cache: Dict[Tuple[Tuple[Tuple[str, str], ...], bool], Dict[str, str]] = {}  # noqa: E501
+        for accept_version in _ACCEPT_VERSIONS:
+            _header = {"Accept": f"application/json;version={accept_version}"}  # noqa: E501
+            self._headers(_header)
+            self._headers(_header, content_type=True)
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections of the client
+        """
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled connections of the client,
+        including the AsyncClient bound to the running event loop
+        """
+        with self._async_clients_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)  # noqa: E501
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "Client":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    def map(
+        self,
+        func: Callable[..., Any],
+        items: Iterable[Any],
+        concurrency: int = 10,
+        ordered: bool = True
+    ) -> Iterator[BulkResult]:
+        """
+        Calls func for every item with at most `concurrency` calls
+        in flight and yields a BulkResult per item.
+        Sync functions run on a thread pool, coroutine functions
+        (e.g. the *_async methods) on a private event loop.
+        Errors of single calls are captured in the BulkResult.
+
+        :param func: function to call, e.g. devices.get_details_by_device_id
+        :param items: call arguments, one item per call
+                      (tuple: positional arguments, dict: keyword arguments,
+                      other values: the single positional argument)
+        :param concurrency: maximum number of calls in flight,
+                            should not exceed the connection pool limits
+        :param ordered: yield in input order instead of completion order
+        """
+        if not asyncio.iscoroutinefunction(func):
+            yield from map_threaded(func, items, concurrency, ordered)
+            return
+        loop = asyncio.new_event_loop()
+        results = map_async(func, items, concurrency, ordered)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            with self._async_clients_lock:
+                client = self._async_clients.pop(loop, None)
+            if client is not None:
+                loop.run_until_complete(client.aclose())
+            loop.close()
+
+    async def async_map(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        items: Iterable[Any],
+        concurrency: int = 10,
+        ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        """
+        The same as map but async, for coroutine functions.
+        """
+        async for result in map_async(func, items, concurrency, ordered):
+            yield result
+
+    def _get_async_client(self) -> AsyncClient:
+        """
+        Returns the pooled AsyncClient of the running event loop,
+        creating it on first use.
+        An AsyncClient can not be shared between event loops,
+        therefore every loop gets its own pool.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = AsyncClient(verify=self.verify, timeout=self.timeout, limits=self.limits, http2=self.http2, auth=self.oauth)  # noqa: E501
+                self._async_clients[loop] = client
+        return client
 
     def get(
         self,
@@ -88,19 +319,25 @@ class Client(object):
         """
         Sends a GET request to the API. Returns the response object.
         """
-        header_tmp: Dict[str, str] = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        header_tmp.update({"Content-Type": "application/json"})
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header, content_type=True)
+        endpoint = self._endpoint(module, path, version)
+        cache = self.response_cache
+        if cache is not None:
+            cached, cache_key, generation = cache.lookup(endpoint, params, header_tmp.get("Accept", ""))  # noqa: E501
+            if cached is not MISSING:
+                return cached
         try:
-            with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = client.get(
-                    endpoint,
-                    params=params,
-                    headers=header_tmp,
-                    timeout=timeout,
+            if self.single_flight is not None:
+                api_response = self.single_flight.call(
+                    request_key("GET", endpoint, params, header_tmp),
+                    lambda: self._get_response(endpoint, params, header_tmp, timeout)  # noqa: E501
                 )
-                response = self._check_for_error(api_response)
-                return response
+            else:
+                api_response = self._get_response(endpoint, params, header_tmp, timeout)  # noqa: E501
+            response = self._check_for_error(api_response)
+            if cache is not None and api_response.is_success:
+                cache.store(endpoint, cache_key, generation, response)
+            return response
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -114,22 +351,26 @@ class Client(object):
         json: Any = None,
         header: dict = {},
         timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
     ) -> RestResponseType:
         """
         Sends a POST request to the API. Returns the response object.
+        Set idempotent if the request is safe to be repeated by the
+        retry policy.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = client.post(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
+            api_response = self._send(
+                "POST",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+                idempotent=idempotent,
+            )
             return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
@@ -149,17 +390,17 @@ class Client(object):
         Sends a POST request to the API.
         Returns the response object without error checking.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-            return client.post(
-                endpoint,
-                params=params,
-                data=data,
-                json=json,
-                headers=header_tmp,
-                timeout=timeout,
-            )
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
+        return self._send(
+            "POST",
+            endpoint,
+            params=params,
+            data=data,
+            json=json,
+            headers=header_tmp,
+            timeout=timeout,
+        )
 
     def put(
         self,
@@ -175,19 +416,19 @@ class Client(object):
         """
         Sends a PUT request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = client.put(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
-                return self._check_for_error(api_response)
+            api_response = self._send(
+                "PUT",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -205,20 +446,20 @@ class Client(object):
         """
         Sends a Patch request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = client.patch(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
-                api_response = self._check_for_error(api_response)
-                return api_response
+            api_response = self._send(
+                "PATCH",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            api_response = self._check_for_error(api_response)
+            return api_response
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -234,20 +475,321 @@ class Client(object):
         """
         Sends a DELETE request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            with SyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = client.delete(
+            api_response = self._send(
+                "DELETE",
+                endpoint,
+                params=params,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            api_response = self._check_for_error(api_response)
+            return api_response
+        except WorkspaceOneAPIError as api_error:
+            raise api_error
+
+    def _get_response(
+        self,
+        endpoint: str,
+        params: _Params,
+        headers: Dict[str, str],
+        timeout: Union[TimeoutTypes, UseClientDefault]
+    ) -> Response:
+        """
+        Sends a GET request, conditional if the validator cache
+        has a stored response for it
+        """
+        if self.validator_cache is None:
+            return self._send("GET", endpoint, params=params, headers=headers, timeout=timeout)  # noqa: E501
+        key, headers, stored = self.validator_cache.prepare(endpoint, params, headers)  # noqa: E501
+        response = self._send("GET", endpoint, params=params, headers=headers, timeout=timeout)  # noqa: E501
+        return self.validator_cache.complete(endpoint, key, stored, response)
+
+    async def _async_get_response(
+        self,
+        endpoint: str,
+        params: _Params,
+        headers: Dict[str, str],
+        timeout: Union[TimeoutTypes, UseClientDefault]
+    ) -> Response:
+        """
+        The same as _get_response but async.
+        """
+        if self.validator_cache is None:
+            return await self._async_send("GET", endpoint, params=params, headers=headers, timeout=timeout)  # noqa: E501
+        key, headers, stored = self.validator_cache.prepare(endpoint, params, headers)  # noqa: E501
+        response = await self._async_send("GET", endpoint, params=params, headers=headers, timeout=timeout)  # noqa: E501
+        return self.validator_cache.complete(endpoint, key, stored, response)
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: _Params = {},
+        data: Any = None,
+        json: Any = None,
+        headers: Dict[str, str] = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
+        stream: bool = False,
+    ) -> Response:
+        """
+        Sends a request with the pooled client, paced by the rate limiter
+        and repeated according to the retry policy.
+        With stream, the body is not read and the caller
+        has to close the response.
+        Write requests invalidate the cached responses of their resource.
+        """
+        if self.response_cache is None or method in _SAFE_METHODS:
+            return self._send_retrying(method, endpoint, params, data, json, headers, timeout, idempotent, stream)  # noqa: E501
+        # invalidated before and after the write,
+        # so GET requests in flight do not cache the old state
+        self.response_cache.invalidate(endpoint)
+        try:
+            return self._send_retrying(method, endpoint, params, data, json, headers, timeout, idempotent, stream)  # noqa: E501
+        finally:
+            self.response_cache.invalidate(endpoint)
+
+    def _send_retrying(
+        self,
+        method: str,
+        endpoint: str,
+        params: _Params = {},
+        data: Any = None,
+        json: Any = None,
+        headers: Dict[str, str] = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
+        stream: bool = False,
+    ) -> Response:
+        """
+        Sends a request, repeated according to the retry policy
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                request = self._client.build_request(
+                    method,
                     endpoint,
                     params=params,
-                    headers=header_tmp,
+                    data=data,
+                    json=json,
+                    headers=headers,
                     timeout=timeout,
                 )
-                api_response = self._check_for_error(api_response)
-                return api_response
-        except WorkspaceOneAPIError as api_error:
-            raise api_error
+                response = self._client.send(request, stream=stream)
+            except TransportError as error:
+                if self.retry_policy is None:
+                    raise
+                delay = self.retry_policy.next_delay(method, attempt, started, idempotent, error=error)  # noqa: E501
+                if delay is None:
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response)
+                if self.retry_policy is None:
+                    return response
+                delay = self.retry_policy.next_delay(method, attempt, started, idempotent, response=response)  # noqa: E501
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    async def _async_send(
+        self,
+        method: str,
+        endpoint: str,
+        params: _Params = {},
+        data: Any = None,
+        json: Any = None,
+        headers: Dict[str, str] = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
+        stream: bool = False,
+    ) -> Response:
+        """
+        The same as _send but async.
+        """
+        if self.response_cache is None or method in _SAFE_METHODS:
+            return await self._async_send_retrying(method, endpoint, params, data, json, headers, timeout, idempotent, stream)  # noqa: E501
+        self.response_cache.invalidate(endpoint)
+        try:
+            return await self._async_send_retrying(method, endpoint, params, data, json, headers, timeout, idempotent, stream)  # noqa: E501
+        finally:
+            self.response_cache.invalidate(endpoint)
+
+    async def _async_send_retrying(
+        self,
+        method: str,
+        endpoint: str,
+        params: _Params = {},
+        data: Any = None,
+        json: Any = None,
+        headers: Dict[str, str] = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
+        stream: bool = False,
+    ) -> Response:
+        """
+        The same as _send_retrying but async.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.async_acquire()
+            try:
+                client = self._get_async_client()
+                request = client.build_request(
+                    method,
+                    endpoint,
+                    params=params,
+                    data=data,
+                    json=json,
+                    headers=headers,
+                    timeout=timeout,
+                )
+                response = await client.send(request, stream=stream)
+            except TransportError as error:
+                if self.retry_policy is None:
+                    raise
+                delay = self.retry_policy.next_delay(method, attempt, started, idempotent, error=error)  # noqa: E501
+                if delay is None:
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response)
+                if self.retry_policy is None:
+                    return response
+                delay = self.retry_policy.next_delay(method, attempt, started, idempotent, response=response)  # noqa: E501
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _endpoint(self, module: str, path: str = "", version: str = "") -> str:  # noqa: E501
+        """
+        Builds the full url endpoint for the API request
+        using the route table of the client.
+        The base url of a (module, version) route is only built once.
+        """
+        route = self._routes.get((module, version))
+        if route is None:
+            route = self._build_endpoint(self.env, module, version=version)
+            self._routes[(module, version)] = route
+        if path:
+            if path.startswith("/"):
+                return f"{route}{path}"
+            else:
+                return f"{route}/{path}"
+        return route
+
+    def _headers(self, header: Dict[str, str] = {}, content_type: bool = False) -> Dict[str, str]:  # noqa: E501
+        """
+        Returns the request header for the given additional header values.
+        The header variants are cached, so the base64 login is only
+        encoded once per client.
+        The returned dict is shared and must not be modified.
+        """
+        key = (tuple(header.items()), content_type)
+        header_tmp = self._header_cache.get(key)
+        if header_tmp is None:
+            header_tmp = dict(header)
+            header_tmp.update(self._base_header)
+            if header.get("Accept"):
+                header_tmp["Accept"] = header["Accept"]
+            if content_type:
+                header_tmp["Content-Type"] = "application/json"
+            if len(self._header_cache) < _HEADER_CACHE_SIZE:
+                self._header_cache[key] = header_tmp
+        return header_tmp
+
+    def stream_get(
+        self,
+        module: str,
+        path: str,
+        items_key: str,
+        version: str = "",
+        params: _Params = {},
+        header: dict = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+    ) -> JsonArrayStream:
+        """
+        Sends a GET request to the API and decodes the `items_key` array
+        of the json response incrementally while it is received.
+        Returns a JsonArrayStream to iterate over the array elements,
+        the other members of the response are available in its `meta`
+        after the iteration. An unsuccessful response raises a
+        WorkspaceOneAPIError when the iteration starts.
+        """
+        header_tmp = self._headers(header, content_type=True)
+        endpoint = self._endpoint(module, path, version)
+
+        def chunks() -> Iterator[str]:
+            response = self._send(
+                "GET",
+                endpoint,
+                params=params,
+                headers=header_tmp,
+                timeout=timeout,
+                stream=True,
+            )
+            try:
+                if not response.is_success:
+                    response.read()
+                    self._check_for_error(response)
+                    raise _status_error(response.status_code)
+                if response.headers.get("Content-Type") in _JSON_CONTENT_TYPES:  # noqa: E501
+                    yield from response.iter_text()
+            finally:
+                response.close()
+
+        return JsonArrayStream(chunks(), items_key)
+
+    def async_stream_get(
+        self,
+        module: str,
+        path: str,
+        items_key: str,
+        version: str = "",
+        params: _Params = {},
+        header: dict = {},
+        timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+    ) -> JsonArrayStream:
+        """
+        The same as stream_get but async (iterate with async for).
+        """
+        header_tmp = self._headers(header, content_type=True)
+        endpoint = self._endpoint(module, path, version)
+
+        async def chunks() -> AsyncIterator[str]:
+            response = await self._async_send(
+                "GET",
+                endpoint,
+                params=params,
+                headers=header_tmp,
+                timeout=timeout,
+                stream=True,
+            )
+            try:
+                if not response.is_success:
+                    await response.aread()
+                    self._check_for_error(response)
+                    raise _status_error(response.status_code)
+                if response.headers.get("Content-Type") in _JSON_CONTENT_TYPES:  # noqa: E501
+                    async for text in response.aiter_text():
+                        yield text
+            finally:
+                await response.aclose()
+
+        return JsonArrayStream(chunks(), items_key)
 
     @staticmethod
     def _check_for_error(response: Response) -> RestResponseType:
@@ -255,10 +797,7 @@ class Client(object):
         Checks the response for json data, then for an error, then for
         a status code
         """
-        if response.headers.get("Content-Type") in (
-            "application/json",
-            "application/json; charset=utf-8",
-        ):
+        if response.headers.get("Content-Type") in _JSON_CONTENT_TYPES:
             json = response.json()
             if isinstance(json, dict):
                 if json.get("errorCode"):
@@ -275,7 +814,7 @@ class Client(object):
         """
         Builds the full url endpoint for the API request
         """
-        if not base_url.startswith("https://"):
+        if not base_url.startswith(("https://", "http://")):
             base_url = "https://" + base_url
         if base_url.endswith("/"):
             base_url = base_url[:-1]
@@ -296,9 +835,7 @@ class Client(object):
         Build the header with base64 login, AW API token,
         and accept a json response
         """
-        header_tmp: Dict[str, str] = {}
-        if header:
-            header_tmp = header
+        header_tmp: Dict[str, str] = dict(header)
         username_password = f"{username}:{password}"
         username_password_bytes = username_password.encode("ascii")
         hashed_auth = b64encode(username_password_bytes).decode("utf-8")
@@ -324,18 +861,25 @@ class Client(object):
         """
         Sends a GET request to the API. Returns the response object.
         """
-        header_tmp: Dict[str, str] = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        header_tmp.update({"Content-Type": "application/json"})
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header, content_type=True)
+        endpoint = self._endpoint(module, path, version)
+        cache = self.response_cache
+        if cache is not None:
+            cached, cache_key, generation = cache.lookup(endpoint, params, header_tmp.get("Accept", ""))  # noqa: E501
+            if cached is not MISSING:
+                return cached
         try:
-            async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = await client.get(
-                    endpoint,
-                    params=params,
-                    headers=header_tmp,
-                    timeout=timeout,
+            if self.single_flight is not None:
+                api_response = await self.single_flight.async_call(
+                    request_key("GET", endpoint, params, header_tmp),
+                    lambda: self._async_get_response(endpoint, params, header_tmp, timeout)  # noqa: E501
                 )
-                return self._check_for_error(api_response)
+            else:
+                api_response = await self._async_get_response(endpoint, params, header_tmp, timeout)  # noqa: E501
+            response = self._check_for_error(api_response)
+            if cache is not None and api_response.is_success:
+                cache.store(endpoint, cache_key, generation, response)
+            return response
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -349,22 +893,26 @@ class Client(object):
         json: Any = None,
         header: dict = {},
         timeout: Union[TimeoutTypes, UseClientDefault] = USE_CLIENT_DEFAULT,
+        idempotent: bool = False,
     ) -> RestResponseType:
         """
         Sends a POST request to the API. Returns the response object.
+        Set idempotent if the request is safe to be repeated by the
+        retry policy.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = await client.post(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
+            api_response = await self._async_send(
+                "POST",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+                idempotent=idempotent,
+            )
             return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
@@ -384,17 +932,17 @@ class Client(object):
         Sends a POST request to the API.
         Returns the response object without error checking.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
-        async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-            return await client.post(
-                endpoint,
-                params=params,
-                data=data,
-                json=json,
-                headers=header_tmp,
-                timeout=timeout,
-            )
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
+        return await self._async_send(
+            "POST",
+            endpoint,
+            params=params,
+            data=data,
+            json=json,
+            headers=header_tmp,
+            timeout=timeout,
+        )
 
     async def async_put(
         self,
@@ -410,19 +958,19 @@ class Client(object):
         """
         Sends a PUT request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = await client.put(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
-                return self._check_for_error(api_response)
+            api_response = await self._async_send(
+                "PUT",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -440,19 +988,19 @@ class Client(object):
         """
         Sends a Patch request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = await client.patch(
-                    endpoint,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
-                return self._check_for_error(api_response)
+            api_response = await self._async_send(
+                "PATCH",
+                endpoint,
+                params=params,
+                data=data,
+                json=json,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
 
@@ -468,16 +1016,16 @@ class Client(object):
         """
         Sends a DELETE request to the API. Returns the response object.
         """
-        header_tmp = self._build_header(self.username, self.password, self.apikey, header)  # noqa: E501
-        endpoint = self._build_endpoint(self.env, module, path, version)
+        header_tmp = self._headers(header)
+        endpoint = self._endpoint(module, path, version)
         try:
-            async with AsyncClient(verify=self.verify, timeout=self.timeout) as client:  # noqa: E501
-                api_response = await client.delete(
-                    endpoint,
-                    params=params,
-                    headers=header_tmp,
-                    timeout=timeout,
-                )
-                return self._check_for_error(api_response)
+            api_response = await self._async_send(
+                "DELETE",
+                endpoint,
+                params=params,
+                headers=header_tmp,
+                timeout=timeout,
+            )
+            return self._check_for_error(api_response)
         except WorkspaceOneAPIError as api_error:
             raise api_error
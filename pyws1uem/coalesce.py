@@ -0,0 +1,120 @@
+"""
+Coalesce Module
+
+Single-flight execution of identical concurrent calls.
+
+While a call for a key is in flight, further calls for the same key do
+not start their own call but wait for the one in flight and share its
+outcome (result or exception). The Client uses it to send concurrent
+identical GET requests only once.
+"""
+
+import asyncio
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+
+class _Call(object):
+    """
+    A sync call in flight
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Any = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical concurrent calls, for threads and event loops
+
+    The counters are available in `stats`:
+    calls (executed) and coalesced (answered by a call in flight).
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {"calls": 0, "coalesced": 0}
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}  # noqa: E501
+
+    def call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Returns func(), or the outcome of the call for the same key
+        already in flight in another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def async_call(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:  # noqa: E501
+        """
+        The same as call but async, calls are coalesced per event loop.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        future = self._futures.get(flight_key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            try:
+                # shield: a cancelled follower must not cancel the shared call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # the call in flight was cancelled, not this one
+            return await self.async_call(key, func)
+        future = loop.create_future()
+        self._futures[flight_key] = future
+        self.stats["calls"] += 1
+        try:
+            result = await func()
+        except BaseException as error:
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(error)
+                # the followers retrieve the exception,
+                # do not warn about it if there are none
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[flight_key]
+
+
+def request_key(method: str, url: str, params: Any, headers: Dict[str, str]) -> Hashable:  # noqa: E501
+    """
+    Returns the coalescing key of a request:
+    method, url, params and the Accept header
+    """
+    if isinstance(params, dict):
+        items: List[Tuple[str, str]] = sorted(
+            (str(name), str(value)) for name, value in params.items()
+        )
+        params = tuple(items)
+    return (method, url, params, headers.get("Accept"))
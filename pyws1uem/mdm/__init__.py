@@ -1,5 +1,15 @@
-__all__ = ['Devices', 'Smartgroups', 'Tags', 'Profiles']
+__all__ = [
+    'Devices', 'DeviceInventory', 'DeviceSnapshot', 'Smartgroups',
+    'SmartgroupIndex',
+    'Tags', 'TagBatcher', 'TagBulkResult', 'TagMembershipIndex',
+    'TagReconcileResult', 'Profiles'
+]
 from pyws1uem.mdm.devices import Devices
+from pyws1uem.mdm.inventory import DeviceInventory
+from pyws1uem.mdm.snapshot import DeviceSnapshot
 from pyws1uem.mdm.smartgroups import Smartgroups
-from pyws1uem.mdm.tags import Tags
+from pyws1uem.mdm.smartgroup_index import SmartgroupIndex
+from pyws1uem.mdm.tags import (
+    Tags, TagBatcher, TagBulkResult, TagMembershipIndex, TagReconcileResult
+)
 from pyws1uem.mdm.profiles import Profiles
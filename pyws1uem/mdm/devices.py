@@ -2,19 +2,130 @@
 Module to manage devices in the WorkspaceONE /mdm context.
 """
 
-from typing import Dict, Union
-from pyws1uem.client import RestResponseType
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple, Union  # noqa: E501
+from pyws1uem.bulk import map_async, map_threaded
+from pyws1uem.cache import MISSING, TTLCache
+from pyws1uem.client import RestResponseType, _is_not_found, _is_success, _raise_for_status  # noqa: E501
+from pyws1uem.error import WorkspaceOneAPIError
+from pyws1uem.mdm.inventory import DeviceInventory
 from pyws1uem.mdm.mdm import MDM
+from pyws1uem.records import DeviceRecord
+from pyws1uem.stream import JsonArrayStream
+
+
+def _alt_id(
+    serialnumber: str = "",
+    macaddress: str = "",
+    udid: str = "",
+    imeinumber: str = "",
+    easid: str = ""
+) -> Union[Tuple[str, str], None]:
+    """
+    Returns the searchby value and the id of the first given alternate id
+    """
+    if serialnumber:
+        return 'Serialnumber', str(serialnumber)
+    if macaddress:
+        return 'Macaddress', str(macaddress)
+    if udid:
+        return 'Udid', str(udid)
+    if imeinumber:
+        return 'ImeiNumber', str(imeinumber)
+    if easid:
+        return 'EasId', str(easid)
+    return None
+
+
+def _alt_id_list(
+    serialnumbers: Iterable[str] = (),
+    macaddresses: Iterable[str] = (),
+    udids: Iterable[str] = (),
+    imeinumbers: Iterable[str] = (),
+    easids: Iterable[str] = ()
+) -> List[Tuple[str, str]]:
+    """
+    Returns the (searchby, id) pairs of the given alternate ids,
+    without duplicates and empty ids, in input order
+    """
+    alt_ids: Dict[Tuple[str, str], None] = {}
+    for searchby, values in (
+        ('Serialnumber', serialnumbers),
+        ('Macaddress', macaddresses),
+        ('Udid', udids),
+        ('ImeiNumber', imeinumbers),
+        ('EasId', easids),
+    ):
+        for value in values:
+            if value:
+                alt_ids[(searchby, str(value))] = None
+    return list(alt_ids)
+
+
+def _response_device_id(response: RestResponseType) -> Union[int, None]:
+    """
+    Returns the DeviceID of a device details response
+    """
+    if (
+        response and
+        isinstance(response, dict) and
+        'Id' in response and
+        isinstance(response['Id'], dict) and
+        'Value' in response['Id'] and
+        isinstance(response['Id']['Value'], int)
+    ):
+        return response['Id']['Value']
+    return None
 
 
 class Devices(MDM):
     """
     A class to manage devices of the Mobile Device Management (MDM) context
     of the WorkspaceONE UEM API.
+
+    Alternate id lookups are answered from `inventory`
+    (a DeviceInventory) while it is fresh.
+    The DeviceIDs resolved by get_id_by_alt_id are cached in `id_cache`
+    after enable_id_cache was called.
     """
 
     def __init__(self, client):
         MDM.__init__(self, client)
+        self.inventory: Union[DeviceInventory, None] = None
+        self.id_cache: Union[TTLCache, None] = None
+
+    def enable_id_cache(self, maxsize: int = 4096, ttl: float = 600.0, negative_ttl: float = 60.0) -> TTLCache:  # noqa: E501
+        """
+        Caches the results of get_id_by_alt_id
+        keyed by (searchby, alternate id).
+
+        :param maxsize: maximum number of cached ids (LRU eviction)
+        :param ttl: seconds a resolved DeviceID is cached
+        :param negative_ttl: seconds an unknown alternate id is cached
+        :return: the cache, see TTLCache.stats for the hit/miss counters
+        """
+        self.id_cache = TTLCache(maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl)  # noqa: E501
+        return self.id_cache
+
+    def _invalidate_device(self, device_id: Any) -> None:
+        """
+        Drops a deleted device from the inventory and the id cache
+        """
+        if self.inventory is not None:
+            self.inventory.remove(device_id)
+        if self.id_cache is not None:
+            self.id_cache.invalidate_where(lambda _, cached_id: cached_id is not None and str(cached_id) == str(device_id))  # noqa: E501
+
+    def _inventory_lookup(self, searchby: str, value: str) -> Union[Dict[str, Any], None]:  # noqa: E501
+        """
+        Returns the device from the inventory mirror if it is fresh
+        """
+        if self.inventory is None or not self.inventory.is_fresh:
+            return None
+        return self.inventory.lookup(searchby, value)
+
+    def _inventory_store(self, response: RestResponseType) -> None:
+        if self.inventory is not None and isinstance(response, dict):
+            self.inventory.upsert(response)
 
     def search(self, **kwargs) -> RestResponseType:
         """
@@ -139,6 +250,100 @@ class Devices(MDM):
         """
         return await self._async_get(path='/devices/extensivesearch', params=kwargs)  # noqa: E501
 
+    def iter_search_all(self, records: bool = False, **kwargs) -> Iterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        Iterates over all Devices matching the search parameters,
+        requesting the pages of search_all one after another.
+
+        :param int page (optional): first page to get. Defaults to 0.
+        :param int pagesize (optional): records per page. Defaults to 500.
+        :param bool records (optional):
+                yield compact DeviceRecord objects instead of the
+                device dicts. Defaults to False.
+        :return: iterator of device records
+        """
+        return self._iter_pages(path='/devices/search', params=kwargs, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_search_all_async(self, prefetch: int = 0, records: bool = False, **kwargs) -> AsyncIterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        The same as iter_search_all but async (use with async for).
+
+        :param int prefetch (optional):
+                number of pages requested concurrently once the first
+                page revealed the total count. Defaults to 0 (sequential).
+        """
+        return self._async_iter_pages(path='/devices/search', params=kwargs, prefetch=prefetch, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_searchv2(self, records: bool = False, **kwargs) -> Iterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        Iterates over all Devices matching the search parameters
+        of the v2 endpoint, page by page.
+        See iter_search_all for the records parameter.
+        """
+        _header = {'Accept': 'application/json;version=2'}
+        return self._iter_pages(path='/devices/search', header=_header, params=kwargs, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_searchv2_async(self, prefetch: int = 0, records: bool = False, **kwargs) -> AsyncIterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        The same as iter_searchv2 but async (use with async for).
+        See iter_search_all_async for the prefetch parameter.
+        """
+        _header = {'Accept': 'application/json;version=2'}
+        return self._async_iter_pages(path='/devices/search', header=_header, params=kwargs, prefetch=prefetch, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_searchv3(self, records: bool = False, **kwargs) -> Iterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        Iterates over all Devices matching the search parameters
+        of the v3 endpoint, page by page.
+        See iter_search_all for the records parameter.
+        """
+        _header = {'Accept': 'application/json;version=3'}
+        return self._iter_pages(path='/devices/search', header=_header, params=kwargs, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_searchv3_async(self, prefetch: int = 0, records: bool = False, **kwargs) -> AsyncIterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        The same as iter_searchv3 but async (use with async for).
+        See iter_search_all_async for the prefetch parameter.
+        """
+        _header = {'Accept': 'application/json;version=3'}
+        return self._async_iter_pages(path='/devices/search', header=_header, params=kwargs, prefetch=prefetch, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_extensive_search(self, stream: bool = False, records: bool = False, **kwargs) -> Iterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        Iterates over the full device details of all Devices
+        matching the extensive_search parameters, page by page.
+
+        :param bool stream (optional):
+                decode every page incrementally while it is received,
+                so only one device record is held in memory at a time.
+                Defaults to False.
+        See iter_search_all for the records parameter.
+        """
+        return self._iter_pages(path='/devices/extensivesearch', params=kwargs, stream=stream, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_extensive_search_async(self, prefetch: int = 0, stream: bool = False, records: bool = False, **kwargs) -> AsyncIterator[Union[Dict[str, Any], DeviceRecord]]:  # noqa: E501
+        """
+        The same as iter_extensive_search but async (use with async for).
+        See iter_search_all_async for the prefetch parameter.
+        """
+        return self._async_iter_pages(path='/devices/extensivesearch', params=kwargs, prefetch=prefetch, stream=stream, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def stream_extensive_search(self, **kwargs) -> JsonArrayStream:
+        """
+        The same as extensive_search, but the Devices of the page are
+        decoded incrementally while the response is received.
+        Iterate over the returned stream to get the device records,
+        the paging information (Page, PageSize, Total) is available
+        in its `meta` dict after the iteration.
+        """
+        return self._stream_get(path='/devices/extensivesearch', params=kwargs)  # noqa: E501
+
+    def stream_extensive_search_async(self, **kwargs) -> JsonArrayStream:
+        """
+        The same as stream_extensive_search but async (use with async for).
+        """
+        return self._async_stream_get(path='/devices/extensivesearch', params=kwargs)  # noqa: E501
+
     def get_details_by_alt_id(
         self,
         serialnumber: str = "",
@@ -158,18 +363,15 @@ class Devices(MDM):
         :return: Device information.
         :rtype: Union[dict, int, None]
         """
-        if serialnumber:
-            response = self.search(searchby='Serialnumber', id=str(serialnumber))  # noqa: E501
-        elif macaddress:
-            response = self.search(searchby='Macaddress', id=str(macaddress))
-        elif udid:
-            response = self.search(searchby='Udid', id=str(udid))
-        elif imeinumber:
-            response = self.search(searchby='ImeiNumber', id=str(imeinumber))
-        elif easid:
-            response = self.search(searchby='EasId', id=str(easid))
-        else:
+        alt_id = _alt_id(serialnumber, macaddress, udid, imeinumber, easid)
+        if alt_id is None:
             return None
+        searchby, value = alt_id
+        device = self._inventory_lookup(searchby, value)
+        if device is not None:
+            return device
+        response = self.search(searchby=searchby, id=value)
+        self._inventory_store(response)
         return response
 
     async def get_details_by_alt_id_async(
@@ -183,18 +385,15 @@ class Devices(MDM):
         """
         The same as get_details_by_alt_id but async.
         """
-        if serialnumber:
-            response = await self.search_async(searchby='Serialnumber', id=str(serialnumber))  # noqa: E501
-        elif macaddress:
-            response = await self.search_async(searchby='Macaddress', id=str(macaddress))  # noqa: E501
-        elif udid:
-            response = await self.search_async(searchby='Udid', id=str(udid))
-        elif imeinumber:
-            response = await self.search_async(searchby='ImeiNumber', id=str(imeinumber))  # noqa: E501
-        elif easid:
-            response = await self.search_async(searchby='EasId', id=str(easid))
-        else:
+        alt_id = _alt_id(serialnumber, macaddress, udid, imeinumber, easid)
+        if alt_id is None:
             return None
+        searchby, value = alt_id
+        device = self._inventory_lookup(searchby, value)
+        if device is not None:
+            return device
+        response = await self.search_async(searchby=searchby, id=value)
+        self._inventory_store(response)
         return response
 
     def get_id_by_alt_id(
@@ -225,20 +424,28 @@ class Devices(MDM):
                 EasID of the Device (mobile).
                 Defaults to an empty string.
 
-        :return: DeviceID as an integer value
+        :return: DeviceID as an integer value,
+                 None if the device is not found
         :rtype: int
         """
-        response = self.get_details_by_alt_id(serialnumber, macaddress, udid, imeinumber, easid)  # noqa: E501
-        if (
-            response and
-            isinstance(response, dict) and
-            'Id' in response and
-            isinstance(response['Id'], dict) and
-            'Value' in response['Id'] and
-            isinstance(response['Id']['Value'], int)
-        ):
-            return response['Id']['Value']
-        return None
+        alt_id = _alt_id(serialnumber, macaddress, udid, imeinumber, easid)
+        if alt_id is None:
+            return None
+        if self.id_cache is not None:
+            device_id = self.id_cache.get(alt_id)
+            if device_id is not MISSING:
+                return device_id
+        try:
+            response = self.get_details_by_alt_id(serialnumber, macaddress, udid, imeinumber, easid)  # noqa: E501
+        except WorkspaceOneAPIError as error:
+            if not _is_not_found(error):
+                raise
+            response = None
+        device_id = _response_device_id(response)
+        # failed requests are not cached, only the device or not found
+        if self.id_cache is not None and _is_success(response):
+            self.id_cache.set(alt_id, device_id)
+        return device_id
 
     async def get_id_by_alt_id_async(
         self,
@@ -251,17 +458,145 @@ class Devices(MDM):
         """
         The same as get_id_by_alt_id but async.
         """
-        response = await self.get_details_by_alt_id_async(serialnumber, macaddress, udid, imeinumber, easid)  # noqa: E501
-        if (
-            response and
-            isinstance(response, dict) and
-            'Id' in response and
-            isinstance(response['Id'], dict) and
-            'Value' in response['Id'] and
-            isinstance(response['Id']['Value'], int)
-        ):
-            return response['Id']['Value']
-        return None
+        alt_id = _alt_id(serialnumber, macaddress, udid, imeinumber, easid)
+        if alt_id is None:
+            return None
+        if self.id_cache is not None:
+            device_id = self.id_cache.get(alt_id)
+            if device_id is not MISSING:
+                return device_id
+        try:
+            response = await self.get_details_by_alt_id_async(serialnumber, macaddress, udid, imeinumber, easid)  # noqa: E501
+        except WorkspaceOneAPIError as error:
+            if not _is_not_found(error):
+                raise
+            response = None
+        device_id = _response_device_id(response)
+        # failed requests are not cached, only the device or not found
+        if self.id_cache is not None and _is_success(response):
+            self.id_cache.set(alt_id, device_id)
+        return device_id
+
+    def _resolve_local(self, alt_ids: List[Tuple[str, str]]) -> Tuple[Dict[str, Union[int, None]], List[Tuple[str, str]]]:  # noqa: E501
+        """
+        Resolves the alternate ids from the id cache and the inventory,
+        returns the resolved ids and the ones left to request
+        """
+        resolved: Dict[str, Union[int, None]] = {}
+        pending = []
+        for searchby, value in alt_ids:
+            device_id = MISSING
+            if self.id_cache is not None:
+                device_id = self.id_cache.get((searchby, value))
+            if device_id is MISSING:
+                device = self._inventory_lookup(searchby, value)
+                if device is not None:
+                    device_id = _response_device_id(device)
+                    if self.id_cache is not None:
+                        self.id_cache.set((searchby, value), device_id)
+            if device_id is MISSING:
+                pending.append((searchby, value))
+            else:
+                resolved[value] = device_id
+        return resolved, pending
+
+    def _store_id(self, searchby: str, value: str, response: RestResponseType) -> Union[int, None]:  # noqa: E501
+        _raise_for_status(response)
+        self._inventory_store(response)
+        device_id = _response_device_id(response)
+        if self.id_cache is not None:
+            self.id_cache.set((searchby, value), device_id)
+        return device_id
+
+    def _fetch_id(self, searchby: str, value: str) -> Union[int, None]:
+        try:
+            response = self.search(searchby=searchby, id=value)
+        except WorkspaceOneAPIError as error:
+            if not _is_not_found(error):
+                raise
+            response = None
+        return self._store_id(searchby, value, response)
+
+    async def _fetch_id_async(self, searchby: str, value: str) -> Union[int, None]:  # noqa: E501
+        try:
+            response = await self.search_async(searchby=searchby, id=value)
+        except WorkspaceOneAPIError as error:
+            if not _is_not_found(error):
+                raise
+            response = None
+        return self._store_id(searchby, value, response)
+
+    @staticmethod
+    def _resolved(alt_ids: List[Tuple[str, str]], resolved: Dict[str, Union[int, None]], errors: Dict[str, BaseException]) -> Tuple[Dict[str, int], List[str], Dict[str, BaseException]]:  # noqa: E501
+        mapping = {}
+        unresolved = []
+        for _, value in alt_ids:
+            device_id = resolved.get(value)
+            if value in errors:
+                continue
+            if device_id is None:
+                unresolved.append(value)
+            else:
+                mapping[value] = device_id
+        return mapping, unresolved, errors
+
+    def resolve_ids(
+        self,
+        serialnumbers: Iterable[str] = (),
+        macaddresses: Iterable[str] = (),
+        udids: Iterable[str] = (),
+        imeinumbers: Iterable[str] = (),
+        easids: Iterable[str] = (),
+        concurrency: int = 10
+    ) -> Tuple[Dict[str, int], List[str], Dict[str, BaseException]]:
+        """
+        Resolves many alternate ids to DeviceIDs.
+
+        Duplicates are requested once, ids known to the id cache
+        or the fresh inventory are answered without a request and
+        the rest is requested concurrently.
+
+        :param serialnumbers: Serialnumbers of the Devices
+        :param macaddresses: MAC-Addresses of the Devices
+        :param udids: Udids of the Devices
+        :param imeinumbers: IMEI Numbers of the Devices
+        :param easids: EasIDs of the Devices
+        :param concurrency: maximum number of requests in flight
+        :return: mapping of the given ids to the DeviceIDs, the list
+                 of ids unknown to the API and the exception per id
+                 whose request failed (e.g. connection or auth errors)
+        """
+        alt_ids = _alt_id_list(serialnumbers, macaddresses, udids, imeinumbers, easids)  # noqa: E501
+        resolved, pending = self._resolve_local(alt_ids)
+        errors = {}
+        for result in map_threaded(self._fetch_id, pending, concurrency=concurrency, ordered=False):  # noqa: E501
+            if result.ok:
+                resolved[result.item[1]] = result.result
+            else:
+                errors[result.item[1]] = result.error
+        return self._resolved(alt_ids, resolved, errors)
+
+    async def resolve_ids_async(
+        self,
+        serialnumbers: Iterable[str] = (),
+        macaddresses: Iterable[str] = (),
+        udids: Iterable[str] = (),
+        imeinumbers: Iterable[str] = (),
+        easids: Iterable[str] = (),
+        concurrency: int = 10
+    ) -> Tuple[Dict[str, int], List[str], Dict[str, BaseException]]:
+        """
+        The same as resolve_ids but async.
+        """
+        alt_ids = _alt_id_list(serialnumbers, macaddresses, udids, imeinumbers, easids)  # noqa: E501
+        resolved, pending = self._resolve_local(alt_ids)
+        errors = {}
+        async for result in map_async(self._fetch_id_async, pending, concurrency=concurrency, ordered=False):  # noqa: E501
+            if result.ok:
+                resolved[result.item[1]] = result.result
+            else:
+                errors[result.item[1]] = result.error
+        return self._resolved(alt_ids, resolved, errors)
 
     def clear_device_passcode(self, device_id: str) -> RestResponseType:  # noqa: E501
         """
@@ -466,13 +801,17 @@ class Devices(MDM):
         :return: API response
         :rtype: dict
         """
-        return self._delete(path=f'/devices/{device_id}')
+        response = self._delete(path=f'/devices/{device_id}')
+        self._invalidate_device(device_id)
+        return response
 
     async def delete_device_by_id_async(self, device_id: str) -> RestResponseType:  # noqa: E501
         """
         The same as delete_device_by_id but async.
         """
-        return await self._async_delete(path=f'/devices/{device_id}')
+        response = await self._async_delete(path=f'/devices/{device_id}')
+        self._invalidate_device(device_id)
+        return response
 
     def delete_customattribute_by_id(self, device_id: str, custom_attributes: str) -> RestResponseType:  # noqa: E501
         """
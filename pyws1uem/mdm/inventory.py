@@ -0,0 +1,253 @@
+"""
+Module to mirror the device inventory of the WorkspaceONE /mdm context
+into a local SQLite database.
+
+The mirror is populated from the paged device search and indexed on
+all alternate ids of a device, so Devices.get_details_by_alt_id and
+Devices.get_id_by_alt_id can be answered without a request to the API
+while the mirror is fresh.
+"""
+
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Union
+
+from pyws1uem.records import _scalar
+
+# searchby value of the API -> column of the alternate id
+SEARCHBY_COLUMNS: Dict[str, str] = {
+    "Serialnumber": "serial_number",
+    "Macaddress": "mac_address",
+    "Udid": "udid",
+    "ImeiNumber": "imei",
+    "EasId": "eas_id",
+    "DeviceId": "device_id",
+}
+
+# column -> key in the device dicts of the search endpoint
+_DEVICE_KEYS: Dict[str, str] = {
+    "serial_number": "SerialNumber",
+    "mac_address": "MacAddress",
+    "udid": "Udid",
+    "imei": "Imei",
+    "eas_id": "EasId",
+}
+
+# rows written per transaction while populating
+_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    device_id INTEGER PRIMARY KEY,
+    serial_number TEXT,
+    mac_address TEXT,
+    udid TEXT,
+    imei TEXT,
+    eas_id TEXT,
+    details TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS devices_serial_number ON devices (serial_number);
+CREATE INDEX IF NOT EXISTS devices_mac_address ON devices (mac_address);
+CREATE INDEX IF NOT EXISTS devices_udid ON devices (udid);
+CREATE INDEX IF NOT EXISTS devices_imei ON devices (imei);
+CREATE INDEX IF NOT EXISTS devices_eas_id ON devices (eas_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _normalize(column: str, value: Any) -> Union[str, None]:
+    """
+    Returns the indexed form of an alternate id,
+    lookups are case-insensitive and ignore MAC separators
+    """
+    if value is None or value == "":
+        return None
+    value = str(value).strip().upper()
+    if column == "mac_address":
+        value = value.replace(":", "").replace("-", "").replace(".", "")
+    return value
+
+
+class DeviceInventory(object):
+    """
+    Local SQLite mirror of the device inventory
+
+    The mirror is fresh for max_age seconds after the last
+    refresh (or populate). Stale mirrors are not used for lookups.
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: float = 3600.0):
+        """
+        Initialize the DeviceInventory
+
+        :param path: SQLite database file, in memory by default
+        :param max_age: seconds the mirror is used after a refresh
+        """
+        self.path = path
+        self.max_age = max_age
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """
+        Closes the database
+        """
+        with self._lock:
+            self._connection.close()
+
+    @property
+    def populated_at(self) -> float:
+        """
+        Time (time.time()) of the last refresh, 0 if never populated
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'populated_at'"
+            ).fetchone()
+        return float(row[0]) if row else 0.0
+
+    @property
+    def is_fresh(self) -> bool:
+        """
+        True if the mirror was refreshed within max_age seconds
+        """
+        return time.time() - self.populated_at <= self.max_age
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM devices").fetchone()[0]  # noqa: E501
+
+    @staticmethod
+    def _row(device: Dict[str, Any], now: float) -> Union[tuple, None]:
+        device_id = _scalar(device.get("Id", device.get("DeviceId")))
+        if not isinstance(device_id, int):
+            return None
+        return (
+            device_id,
+            *(
+                _normalize(column, device.get(key))
+                for column, key in _DEVICE_KEYS.items()
+            ),
+            json.dumps(device),
+            now,
+        )
+
+    def populate(self, devices: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replaces the mirror with the given device dicts
+        (as returned by Devices.search_all) and marks it fresh.
+        The devices are written in batches, lookups keep answering
+        from the previous data while the mirror is populated.
+        Only a complete walk replaces the mirror: if the devices raise
+        (e.g. a failed page), no device is dropped and the freshness
+        is not renewed.
+
+        :return: number of devices stored
+        """
+        now = time.time()
+        rows = (self._row(device, now) for device in devices)
+        batch = []
+        for row in rows:
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= _BATCH_SIZE:
+                self._write(batch)
+                batch = []
+        self._write(batch)
+        return self._finish_populate(now)
+
+    def _finish_populate(self, now: float) -> int:
+        """
+        Drops the devices not written since `now` and marks the mirror fresh
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM devices WHERE updated_at < ?", (now,))  # noqa: E501
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('populated_at', ?)",
+                (str(now),)
+            )
+            return self._connection.execute("SELECT COUNT(*) FROM devices").fetchone()[0]  # noqa: E501
+
+    def _write(self, rows: List[tuple]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?, ?, ?, ?, ?)",  # noqa: E501
+                rows
+            )
+
+    def refresh(self, devices: Any, **kwargs) -> int:
+        """
+        Populates the mirror from the paged device search
+
+        :param devices: Devices object used to query the API
+        :param kwargs: search_all params (e.g. lgid, platform)
+        :return: number of devices stored
+        :raises WorkspaceOneAPIError: if a page cannot be requested,
+                                      the mirror is kept (see populate)
+        """
+        return self.populate(devices.iter_search_all(**kwargs))
+
+    async def refresh_async(self, devices: Any, prefetch: int = 0, **kwargs) -> int:  # noqa: E501
+        """
+        The same as refresh but async.
+        See Devices.iter_search_all_async for the prefetch parameter.
+        """
+        now = time.time()
+        batch = []
+        async for device in devices.iter_search_all_async(prefetch=prefetch, **kwargs):  # noqa: E501
+            row = self._row(device, now)
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= _BATCH_SIZE:
+                self._write(batch)
+                batch = []
+        self._write(batch)
+        return self._finish_populate(now)
+
+    def upsert(self, device: Dict[str, Any]) -> None:
+        """
+        Adds or updates a single device dict, e.g. fetched from the API
+        """
+        row = self._row(device, time.time())
+        if row is not None:
+            self._write([row])
+
+    def remove(self, device_id: Any) -> None:
+        """
+        Removes a device from the mirror
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM devices WHERE device_id = ?", (int(device_id),)
+            )
+
+    def lookup(self, searchby: str, value: Any) -> Union[Dict[str, Any], None]:  # noqa: E501
+        """
+        Returns the device dict with the given alternate id
+
+        :param searchby: Serialnumber, Macaddress, Udid, ImeiNumber,
+                         EasId or DeviceId
+        :param value: the alternate id
+        :return: the device dict or None if the device is not mirrored
+        """
+        column = SEARCHBY_COLUMNS[searchby]
+        if column == "device_id":
+            key: Any = int(value)
+        else:
+            key = _normalize(column, value)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT details FROM devices WHERE {column} = ? LIMIT 1",
+                (key,)
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,207 @@
+"""
+Module to index the smartgroup membership of all devices.
+
+The smartgroups of a single device are available with
+Devices.get_device_smartgroups, one request per device. There are far
+fewer smartgroups than devices, so the index requests the devices of
+every smartgroup instead (concurrently) and inverts the membership
+into a device id -> smartgroup ids map.
+"""
+
+import time
+from array import array
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple, Union
+
+from pyws1uem.bulk import BulkResult, map_async, map_threaded
+from pyws1uem.mdm.smartgroups import Smartgroups
+from pyws1uem.records import _scalar
+
+# typecode of the id arrays, signed 32 bit
+_TYPECODE = "i"
+
+_Index = Tuple[Dict[int, array], Dict[int, array]]
+
+
+def _device_id(device: Dict[str, Any]) -> Union[int, None]:
+    """
+    Returns the device id of a smartgroup device dict
+    """
+    for key in ("Id", "DeviceId"):
+        if key in device:
+            device_id = _scalar(device[key])
+            return device_id if isinstance(device_id, int) else None
+    return None
+
+
+def _smartgroup_id(group: Any) -> Union[int, None]:
+    """
+    Returns the smartgroup id of a smartgroup of the search
+    """
+    if not isinstance(group, dict):
+        return None
+    group_id = _scalar(group.get("SmartGroupID", group.get("SmartGroupId", group.get("Id"))))  # noqa: E501
+    return group_id if isinstance(group_id, int) else None
+
+
+def _set_group(index: _Index, group_id: int, device_ids: Union[array, None]) -> None:  # noqa: E501
+    """
+    Replaces the devices of a group in both directions of the index,
+    None removes the group
+    """
+    groups, devices = index
+    old = set(groups.get(group_id, ()))
+    new = set(device_ids or ())
+    for device_id in old - new:
+        device_groups = devices[device_id]
+        device_groups.remove(group_id)
+        if not device_groups:
+            del devices[device_id]
+    for device_id in new - old:
+        device_groups = devices.get(device_id)
+        if device_groups is None:
+            device_groups = devices[device_id] = array(_TYPECODE)
+        device_groups.append(group_id)
+    if device_ids is None:
+        groups.pop(group_id, None)
+    else:
+        groups[group_id] = device_ids
+
+
+class SmartgroupIndex(object):
+    """
+    Reverse index of the smartgroup membership of the devices
+
+    The device ids of every smartgroup and the smartgroup ids of every
+    device are kept in integer arrays (4 bytes per id). A build replaces
+    the whole index, refresh_group updates the devices of a single
+    smartgroup. Smartgroups that failed to load keep their previous
+    devices; the failures are listed in stats["errors"].
+    """
+
+    def __init__(self, smartgroups: Smartgroups):
+        """
+        Initialize the SmartgroupIndex
+
+        :param smartgroups: Smartgroups object used to query the API
+        """
+        self.smartgroups = smartgroups
+        self.stats: Dict[str, Any] = {}
+        self._groups: Dict[int, array] = {}
+        self._devices: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def groups_of(self, device_id: Any) -> List[int]:
+        """
+        Returns the ids of the smartgroups of a device
+        """
+        return sorted(self._devices.get(int(device_id), ()))
+
+    def devices_of(self, smartgroup_id: Any) -> array:
+        """
+        Returns the device ids of a smartgroup
+        """
+        return self._groups.get(int(smartgroup_id), array(_TYPECODE))
+
+    def _fetch(self, smartgroup_id: int) -> array:
+        device_ids = []
+        for device in self.smartgroups.iter_devices(smartgroup_id, records=False):  # noqa: E501
+            device_id = _device_id(device)
+            if device_id is not None:
+                device_ids.append(device_id)
+        return array(_TYPECODE, sorted(device_ids))
+
+    async def _fetch_async(self, smartgroup_id: int) -> array:
+        device_ids = []
+        async for device in self.smartgroups.iter_devices_async(smartgroup_id, records=False):  # noqa: E501
+            device_id = _device_id(device)
+            if device_id is not None:
+                device_ids.append(device_id)
+        return array(_TYPECODE, sorted(device_ids))
+
+    def _start(self) -> Tuple[_Index, float]:
+        self.stats = {"groups": 0, "devices": 0, "errors": [], "seconds": 0.0}  # noqa: E501
+        return ({}, {}), time.monotonic()
+
+    def _apply(self, index: _Index, result: BulkResult) -> None:
+        if result.ok:
+            _set_group(index, result.item, result.result)
+            return
+        self.stats["errors"].append((result.item, result.error))
+        previous = self._groups.get(result.item)
+        if previous is not None:
+            _set_group(index, result.item, previous)
+
+    def _finish(self, index: _Index, started: float) -> Dict[str, Any]:
+        self._groups, self._devices = index
+        self.stats["groups"] = len(self._groups)
+        self.stats["devices"] = len(self._devices)
+        self.stats["seconds"] = time.monotonic() - started
+        return self.stats
+
+    def build(self, smartgroup_ids: Union[Iterable[int], None] = None, concurrency: int = 8) -> Dict[str, Any]:  # noqa: E501
+        """
+        Requests the devices of the smartgroups concurrently
+        and replaces the index
+
+        :param smartgroup_ids: the smartgroups to index,
+                               all smartgroups by default
+        :param concurrency: maximum number of smartgroups loaded at a time
+        :return: counters of the build (groups, devices, errors, seconds)
+        """
+        index, started = self._start()
+        if smartgroup_ids is None:
+            smartgroup_ids = [
+                group_id for group_id in map(_smartgroup_id, self.smartgroups.iter_smartgroups())  # noqa: E501
+                if group_id is not None
+            ]
+        for result in map_threaded(self._fetch, map(int, smartgroup_ids), concurrency=concurrency, ordered=False):  # noqa: E501
+            self._apply(index, result)
+        return self._finish(index, started)
+
+    async def build_async(self, smartgroup_ids: Union[Iterable[int], None] = None, concurrency: int = 8) -> Dict[str, Any]:  # noqa: E501
+        """
+        The same as build but async.
+        """
+        index, started = self._start()
+        if smartgroup_ids is None:
+            smartgroup_ids = [
+                group_id async for group_id in self._smartgroup_ids_async()
+            ]
+        async for result in map_async(self._fetch_async, map(int, smartgroup_ids), concurrency=concurrency, ordered=False):  # noqa: E501
+            self._apply(index, result)
+        return self._finish(index, started)
+
+    async def _smartgroup_ids_async(self) -> AsyncIterator[int]:
+        async for group in self.smartgroups.iter_smartgroups_async():
+            group_id = _smartgroup_id(group)
+            if group_id is not None:
+                yield group_id
+
+    def refresh_group(self, smartgroup_id: int) -> int:
+        """
+        Requests the devices of a single smartgroup
+        and updates the index
+
+        :return: number of devices of the smartgroup
+        :raises WorkspaceOneAPIError: if a page cannot be requested,
+                                      the index is unchanged
+        """
+        device_ids = self._fetch(int(smartgroup_id))
+        _set_group((self._groups, self._devices), int(smartgroup_id), device_ids)  # noqa: E501
+        return len(device_ids)
+
+    async def refresh_group_async(self, smartgroup_id: int) -> int:
+        """
+        The same as refresh_group but async.
+        """
+        device_ids = await self._fetch_async(int(smartgroup_id))
+        _set_group((self._groups, self._devices), int(smartgroup_id), device_ids)  # noqa: E501
+        return len(device_ids)
+
+    def remove_group(self, smartgroup_id: int) -> None:
+        """
+        Removes a (deleted) smartgroup from the index
+        """
+        _set_group((self._groups, self._devices), int(smartgroup_id), None)
@@ -4,7 +4,9 @@ Module to manage smartgroups (add and remove)
 
 from pyws1uem.mdm.mdm import MDM
 from pyws1uem.client import Client, RestResponseType
-from typing import List, Dict
+from pyws1uem.records import DeviceRecord
+from pyws1uem.rest import _page_total
+from typing import Any, AsyncIterator, Dict, Iterator, List, Union
 
 
 class Smartgroups(MDM):
@@ -252,6 +254,66 @@ class Smartgroups(MDM):
         """
         return await self._async_get(path=f'/smartgroups/{smartgroup_id}/devices')  # noqa: E501
 
+    def iter_devices(self, smartgroup_id: str, records: bool = True, stream: bool = False, **kwargs) -> Iterator[Union[DeviceRecord, Dict[str, Any]]]:  # noqa: E501
+        """
+        Iterates over the devices of a smartgroup, page by page
+        (page, pagesize params), so the membership of large groups
+        is not held in memory at once.
+
+        :param bool records (optional):
+                yield compact DeviceRecord objects (id, uuid, name, ...)
+                instead of the device dicts. Defaults to True.
+        :param bool stream (optional):
+                decode every page incrementally while it is received.
+                Defaults to False.
+        """
+        return self._iter_pages(path=f'/smartgroups/{smartgroup_id}/devices', params=kwargs, stream=stream, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def iter_devices_async(self, smartgroup_id: str, records: bool = True, stream: bool = False, prefetch: int = 0, **kwargs) -> AsyncIterator[Union[DeviceRecord, Dict[str, Any]]]:  # noqa: E501
+        """
+        The same as iter_devices but async (use with async for).
+        See Devices.iter_search_all_async for the prefetch parameter.
+        """
+        return self._async_iter_pages(path=f'/smartgroups/{smartgroup_id}/devices', params=kwargs, prefetch=prefetch, stream=stream, item_factory=DeviceRecord.from_dict if records else None)  # noqa: E501
+
+    def count_devices(self, smartgroup_id: str) -> int:
+        """
+        Returns the number of devices of a smartgroup.
+        Only a page of one device is requested if the API reports
+        the total count, otherwise the devices are counted
+        while they are streamed.
+
+        :raises WorkspaceOneAPIError: if a page cannot be requested
+        """
+        page = self._stream_get(path=f'/smartgroups/{smartgroup_id}/devices', params={'page': 0, 'pagesize': 1})  # noqa: E501
+        count = sum(1 for _ in page)
+        total = _page_total(page.meta)
+        if total is not None:
+            return total
+        if count != 1:
+            # empty group or the paging params are ignored
+            return count
+        return sum(1 for _ in self.iter_devices(smartgroup_id, records=False, stream=True))  # noqa: E501
+
+    async def count_devices_async(self, smartgroup_id: str) -> int:
+        """
+        The same as count_devices but async.
+        """
+        page = self._async_stream_get(path=f'/smartgroups/{smartgroup_id}/devices', params={'page': 0, 'pagesize': 1})  # noqa: E501
+        count = 0
+        async for _ in page:
+            count += 1
+        total = _page_total(page.meta)
+        if total is not None:
+            return total
+        if count != 1:
+            # empty group or the paging params are ignored
+            return count
+        count = 0
+        async for _ in self.iter_devices_async(smartgroup_id, records=False, stream=True):  # noqa: E501
+            count += 1
+        return count
+
     def get_apps(self, smartgroup_id: str) -> RestResponseType:
         """
         Get all apps of a smartgroup
@@ -275,3 +337,17 @@ class Smartgroups(MDM):
         Search smartgroups by name
         """
         return await self._async_get(path=f'/smartgroups/search?name={search_term}')  # noqa: E501
+
+    def iter_smartgroups(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over the smartgroups of the search, page by page
+        (e.g. name, organizationgroupid, page, pagesize params)
+        """
+        return self._iter_pages(path='/smartgroups/search', items_key='SmartGroups', params=kwargs)  # noqa: E501
+
+    def iter_smartgroups_async(self, prefetch: int = 0, **kwargs) -> AsyncIterator[Dict[str, Any]]:  # noqa: E501
+        """
+        The same as iter_smartgroups but async (use with async for).
+        See Devices.iter_search_all_async for the prefetch parameter.
+        """
+        return self._async_iter_pages(path='/smartgroups/search', items_key='SmartGroups', params=kwargs, prefetch=prefetch)  # noqa: E501
@@ -0,0 +1,215 @@
+"""
+Module to keep a local snapshot of the devices in sync
+with the WorkspaceONE /mdm context.
+
+The first refresh downloads all devices with the extensive search.
+Every following refresh only requests the devices seen
+(startdatetime) or with an enrollment status change
+(statuschangestarttime) since the last refresh and merges them
+into the snapshot.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Union
+
+from pyws1uem.mdm.devices import Devices
+from pyws1uem.records import DeviceRecord, _scalar
+
+# datetime format of the startdatetime and statuschangestarttime params
+_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+_Device = Union[Dict[str, Any], DeviceRecord]
+
+
+def _device_id(device: _Device) -> Any:
+    """
+    Returns the device id of a device dict or record
+    """
+    if isinstance(device, DeviceRecord):
+        return device.id
+    for key in ("DeviceId", "Id", "id"):
+        if key in device:
+            return _scalar(device[key])
+    return None
+
+
+class DeviceSnapshot(object):
+    """
+    Local snapshot of the devices, kept up to date with delta syncs
+
+    The watermark is the start time of the last successful refresh.
+    Delta syncs request the changes since the watermark minus the
+    overlap, so clock skew between the client and the API does not
+    lose changes. Devices deleted in UEM are only removed from the
+    snapshot by a full refresh (see full_refresh_interval).
+    """
+
+    def __init__(
+        self,
+        devices: Devices,
+        overlap: float = 600.0,
+        full_refresh_interval: float = 0.0,
+        records: bool = False,
+        params: Union[Dict[str, Any], None] = None
+    ):
+        """
+        Initialize the DeviceSnapshot
+
+        :param devices: Devices object used to query the API
+        :param overlap: seconds the delta syncs reach back
+                        before the watermark
+        :param full_refresh_interval: seconds after which a refresh
+                                      downloads all devices again,
+                                      0 for never
+        :param records: keep DeviceRecord objects instead of the
+                        device dicts
+        :param params: additional extensive_search params of every
+                       request (e.g. organizationgroupid, platform)
+        """
+        self.devices = devices
+        self.overlap = overlap
+        self.full_refresh_interval = full_refresh_interval
+        self.records = records
+        self.params = dict(params or {})
+        self.snapshot: Dict[Any, _Device] = {}
+        self.watermark: Union[datetime, None] = None
+        self.full_refreshed_at: Union[datetime, None] = None
+        self.stats: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __iter__(self) -> Iterator[_Device]:
+        return iter(self.snapshot.values())
+
+    def get(self, device_id: Any) -> Union[_Device, None]:
+        """
+        Returns the device with the given device id from the snapshot
+        """
+        return self.snapshot.get(device_id)
+
+    def _needs_full_refresh(self, now: datetime) -> bool:
+        if self.watermark is None or self.full_refreshed_at is None:
+            return True
+        return (
+            self.full_refresh_interval > 0 and
+            (now - self.full_refreshed_at).total_seconds() >= self.full_refresh_interval  # noqa: E501
+        )
+
+    def _start(self, full: bool) -> Dict[Any, _Device]:
+        """
+        Returns the dict the fetched devices are collected in,
+        the snapshot is only changed by _finish
+        """
+        self.stats = {"full": full, "fetched": 0, "added": 0, "updated": 0, "removed": 0}  # noqa: E501
+        return {}
+
+    def _merge(self, snapshot: Dict[Any, _Device], device: _Device) -> None:  # noqa: E501
+        self.stats["fetched"] += 1
+        snapshot[_device_id(device)] = device
+
+    def _finish(self, snapshot: Dict[Any, _Device], now: datetime, started: float) -> Dict[str, Any]:  # noqa: E501
+        """
+        Replaces (full refresh) or updates (delta sync) the snapshot
+        with the fetched devices and moves the watermark
+        """
+        self.stats["added"] = len(snapshot.keys() - self.snapshot.keys())
+        self.stats["updated"] = len(snapshot) - self.stats["added"]
+        if self.stats["full"]:
+            self.stats["removed"] = len(self.snapshot.keys() - snapshot.keys())  # noqa: E501
+            self.snapshot = snapshot
+            self.full_refreshed_at = now
+        else:
+            self.snapshot.update(snapshot)
+        self.watermark = now
+        self.stats["devices"] = len(self.snapshot)
+        self.stats["seconds"] = time.monotonic() - started
+        return self.stats
+
+    def _queries(self, full: bool) -> Iterator[Dict[str, Any]]:
+        """
+        Returns the extensive_search params of a refresh
+        """
+        if full:
+            yield self.params
+            return
+        since = (self.watermark - timedelta(seconds=self.overlap)).strftime(_DATETIME_FORMAT)  # noqa: E501
+        yield {**self.params, "startdatetime": since}
+        yield {**self.params, "statuschangestarttime": since}
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Brings the snapshot up to date,
+        with a delta sync if possible.
+
+        :param full: download all devices even if a delta sync is possible
+        :return: counters of the refresh
+                 (full, fetched, added, updated, removed, devices, seconds)
+        :raises WorkspaceOneAPIError: if a page cannot be requested,
+                                      the snapshot and the watermark
+                                      are kept
+        """
+        started = time.monotonic()
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        full = full or self._needs_full_refresh(now)
+        snapshot = self._start(full)
+        for params in self._queries(full):
+            for device in self.devices.iter_extensive_search(records=self.records, **params):  # noqa: E501
+                self._merge(snapshot, device)
+        return self._finish(snapshot, now, started)
+
+    async def refresh_async(self, full: bool = False, prefetch: int = 0) -> Dict[str, Any]:  # noqa: E501
+        """
+        The same as refresh but async.
+        See Devices.iter_search_all_async for the prefetch parameter.
+        """
+        started = time.monotonic()
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        full = full or self._needs_full_refresh(now)
+        snapshot = self._start(full)
+        for params in self._queries(full):
+            async for device in self.devices.iter_extensive_search_async(prefetch=prefetch, records=self.records, **params):  # noqa: E501
+                self._merge(snapshot, device)
+        return self._finish(snapshot, now, started)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the snapshot and its watermark to a json file
+        """
+        state = {
+            "watermark": self.watermark.strftime(_DATETIME_FORMAT) if self.watermark else None,  # noqa: E501
+            "full_refreshed_at": self.full_refreshed_at.strftime(_DATETIME_FORMAT) if self.full_refreshed_at else None,  # noqa: E501
+            "records": self.records,
+            "devices": [
+                device.to_dict() if isinstance(device, DeviceRecord) else device  # noqa: E501
+                for device in self.snapshot.values()
+            ],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as snapshot_file:
+            json.dump(state, snapshot_file)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        Reads a snapshot written by save,
+        returns False if the file does not exist.
+        A snapshot saved with a different records setting is ignored.
+        """
+        try:
+            with open(path, "r") as snapshot_file:
+                state = json.load(snapshot_file)
+        except FileNotFoundError:
+            return False
+        if state.get("records") != self.records:
+            return False
+        devices = state.get("devices") or []
+        if self.records:
+            devices = [DeviceRecord(**device) for device in devices]
+        self.snapshot = {_device_id(device): device for device in devices}
+        self.watermark = state.get("watermark") and datetime.strptime(state["watermark"], _DATETIME_FORMAT)  # noqa: E501
+        self.full_refreshed_at = state.get("full_refreshed_at") and datetime.strptime(state["full_refreshed_at"], _DATETIME_FORMAT)  # noqa: E501
+        return True
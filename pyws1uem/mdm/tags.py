@@ -2,8 +2,399 @@
 Module to manage device tags (add and remove)
 """
 
-from pyws1uem.client import Client, RestResponseType
+import asyncio
+import time
+from itertools import islice
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Union
+from pyws1uem.bulk import BulkResult, map_async, map_threaded
+from pyws1uem.client import Client, RestResponseType, _is_success, _raise_for_status, _status_error  # noqa: E501
 from pyws1uem.mdm.mdm import MDM
+from pyws1uem.rest import DEFAULT_PAGE_SIZE
+
+
+def _chunks(device_ids: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:  # noqa: E501
+    device_ids = iter(device_ids)
+    while True:
+        chunk = list(islice(device_ids, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _tag_devices(response: RestResponseType) -> List[Dict[str, Any]]:
+    """
+    Returns the devices of a /tags/{id}/devices response
+    """
+    if (
+        response and
+        isinstance(response, dict) and
+        'Device' in response and
+        isinstance(response['Device'], list)
+    ):
+        return [device for device in response['Device'] if isinstance(device, dict)]  # noqa: E501
+    return []
+
+
+def _accepted_ids(device_ids: List[Any], response: RestResponseType) -> List[Any]:  # noqa: E501
+    """
+    Returns the device ids of an add/remove request accepted by the API
+    """
+    if not isinstance(response, dict):
+        # answered without json, only a 2xx status means accepted
+        return device_ids if _is_success(response) else []
+    if not response.get('FailedItems'):
+        return device_ids
+    faults = response.get('Faults')
+    if not isinstance(faults, dict) or not isinstance(faults.get('Fault'), list):  # noqa: E501
+        # failed items are not known
+        return []
+    failed = {
+        str(fault.get('ItemValue')) for fault in faults['Fault']
+        if isinstance(fault, dict)
+    }
+    return [device_id for device_id in device_ids if str(device_id) not in failed]  # noqa: E501
+
+
+def _device_response(device_id: Any, accepted: Set[str], response: RestResponseType) -> RestResponseType:  # noqa: E501
+    """
+    Returns the part of an add/remove response
+    concerning a single device of the request
+
+    :param accepted: the accepted device ids of the request as strings
+    """
+    if not isinstance(response, dict):
+        return response
+    faults = response.get('Faults')
+    faults = [
+        fault for fault in faults['Fault']
+        if isinstance(fault, dict) and str(fault.get('ItemValue')) == str(device_id)  # noqa: E501
+    ] if isinstance(faults, dict) and isinstance(faults.get('Fault'), list) else []  # noqa: E501
+    ok = str(device_id) in accepted
+    return {
+        'AcceptedItems': int(ok),
+        'FailedItems': int(not ok),
+        'Faults': {'Fault': faults},
+    }
+
+
+class TagMembershipIndex(object):
+    """
+    Index of the devices of tags, by DeviceId and by DeviceUuid
+
+    The devices of a tag are loaded from the API on first use and
+    reloaded after ttl seconds. The add/remove calls of Tags update
+    the index, a device added that way is only known by its DeviceId
+    until the next reload.
+    The counters are available in `stats`: loads, hits and misses
+    (membership checks of tags that had to be loaded first).
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        :param ttl: seconds the devices of a tag are used before reloading
+        """
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"loads": 0, "hits": 0, "misses": 0}
+        # tag id -> (loaded at, DeviceId -> DeviceUuid, DeviceUuid -> DeviceId)  # noqa: E501
+        self._tags: Dict[str, Tuple[float, Dict[str, str], Dict[str, str]]] = {}  # noqa: E501
+        self._lock = Lock()
+
+    def is_fresh(self, tag_id: Any) -> bool:
+        """
+        True if the devices of the tag are loaded and not expired
+        """
+        entry = self._tags.get(str(tag_id))
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def load(self, tag_id: Any, devices: List[Dict[str, Any]]) -> None:
+        """
+        Replaces the devices of a tag
+        """
+        device_ids = {
+            str(device['DeviceId']): str(device.get('DeviceUuid') or '')
+            for device in devices if device.get('DeviceId') is not None
+        }
+        device_uuids = {
+            device_uuid: device_id
+            for device_id, device_uuid in device_ids.items() if device_uuid
+        }
+        with self._lock:
+            self._tags[str(tag_id)] = (time.monotonic(), device_ids, device_uuids)  # noqa: E501
+            self.stats["loads"] += 1
+
+    def invalidate(self, tag_id: Any = None) -> None:
+        """
+        Drops the devices of a tag (or of all tags)
+        """
+        with self._lock:
+            if tag_id is None:
+                self._tags.clear()
+            else:
+                self._tags.pop(str(tag_id), None)
+
+    def contains(self, tag_id: Any, device_id: Any = "", device_uuid: Any = "") -> bool:  # noqa: E501
+        """
+        True if the device (by DeviceId or DeviceUuid) has the tag,
+        the devices of the tag must be loaded
+        """
+        _, device_ids, device_uuids = self._tags[str(tag_id)]
+        return (
+            (device_id != "" and str(device_id) in device_ids) or
+            (device_uuid != "" and str(device_uuid) in device_uuids)
+        )
+
+    def add(self, tag_id: Any, device_ids: Iterable[Any]) -> None:
+        """
+        Adds devices (by DeviceId) to a loaded tag
+        """
+        with self._lock:
+            entry = self._tags.get(str(tag_id))
+            if entry is not None:
+                for device_id in device_ids:
+                    entry[1].setdefault(str(device_id), '')
+
+    def remove(self, tag_id: Any, device_ids: Iterable[Any]) -> None:
+        """
+        Removes devices (by DeviceId) from a loaded tag
+        """
+        with self._lock:
+            entry = self._tags.get(str(tag_id))
+            if entry is not None:
+                for device_id in device_ids:
+                    entry[2].pop(entry[1].pop(str(device_id), ''), None)
+
+
+class TagBulkResult(object):
+    """
+    Combined result of a chunked add_devices / remove_devices call
+
+    :ivar accepted: number of devices accepted by the API
+    :ivar failed: number of devices failed, including the devices
+                  of chunks whose request failed
+    :ivar faults: the Fault entries of the responses
+                  (ErrorCode, ItemValue, Message)
+    :ivar errors: (device ids of the chunk, exception) per failed request
+    :ivar chunks: number of requests sent
+    """
+    __slots__ = ('accepted', 'failed', 'faults', 'errors', 'chunks')
+
+    def __init__(self):
+        self.accepted = 0
+        self.failed = 0
+        self.faults: List[Dict[str, Any]] = []
+        self.errors: List[Tuple[List[Any], BaseException]] = []
+        self.chunks = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+    def add(self, result: BulkResult) -> None:
+        """
+        Adds the result of one chunk request
+        """
+        chunk = result.item
+        self.chunks += 1
+        if not result.ok:
+            self.failed += len(chunk)
+            self.errors.append((chunk, result.error))
+            return
+        response = result.result
+        if not isinstance(response, dict):
+            # answered without json, only a 2xx status means accepted
+            if _is_success(response):
+                self.accepted += len(chunk)
+            else:
+                self.failed += len(chunk)
+                self.errors.append((chunk, _status_error(response)))
+            return
+        self.accepted += int(response.get('AcceptedItems') or 0)
+        self.failed += int(response.get('FailedItems') or 0)
+        faults = response.get('Faults')
+        if isinstance(faults, dict) and isinstance(faults.get('Fault'), list):
+            self.faults.extend(faults['Fault'])
+
+    def __repr__(self) -> str:
+        return f'TagBulkResult(accepted={self.accepted}, failed={self.failed}, chunks={self.chunks})'  # noqa: E501
+
+
+class TagReconcileResult(object):
+    """
+    Report of a Tags.reconcile call
+
+    :ivar desired: number of distinct desired devices
+    :ivar current: number of devices that had the tag
+    :ivar to_add: device ids the tag is added to
+    :ivar to_remove: device ids the tag is removed from
+    :ivar unchanged: number of devices already in the desired state
+    :ivar added: result of the add requests, None on a dry run
+    :ivar removed: result of the remove requests, None on a dry run
+    :ivar dry_run: True if no add/remove request was sent
+    :ivar seconds: timings (fetch, add, remove, total)
+    """
+    __slots__ = (
+        'desired', 'current', 'to_add', 'to_remove', 'unchanged',
+        'added', 'removed', 'dry_run', 'seconds'
+    )
+
+    def __init__(self, dry_run: bool):
+        self.desired = 0
+        self.current = 0
+        self.to_add: List[Any] = []
+        self.to_remove: List[Any] = []
+        self.unchanged = 0
+        self.added: Union[TagBulkResult, None] = None
+        self.removed: Union[TagBulkResult, None] = None
+        self.dry_run = dry_run
+        self.seconds: Dict[str, float] = {"fetch": 0.0, "add": 0.0, "remove": 0.0, "total": 0.0}  # noqa: E501
+
+    @property
+    def ok(self) -> bool:
+        return all(result is None or result.ok for result in (self.added, self.removed))  # noqa: E501
+
+    def diff(self, current: List[Dict[str, Any]], desired_device_ids: Iterable[Any]) -> None:  # noqa: E501
+        """
+        Computes the devices to add and to remove
+        from the current devices of the tag
+        """
+        current_ids = {
+            str(device['DeviceId']): device['DeviceId']
+            for device in current if device.get('DeviceId') is not None
+        }
+        desired = {}
+        for device_id in desired_device_ids:
+            desired.setdefault(str(device_id), device_id)
+        self.desired = len(desired)
+        self.current = len(current_ids)
+        self.to_add = [device_id for key, device_id in desired.items() if key not in current_ids]  # noqa: E501
+        self.to_remove = [device_id for key, device_id in current_ids.items() if key not in desired]  # noqa: E501
+        self.unchanged = self.desired - len(self.to_add)
+
+    def __repr__(self) -> str:
+        return f'TagReconcileResult(to_add={len(self.to_add)}, to_remove={len(self.to_remove)}, unchanged={self.unchanged}, dry_run={self.dry_run})'  # noqa: E501
+
+
+def _opposite(action: str) -> str:
+    return 'removedevices' if action == 'adddevices' else 'adddevices'
+
+
+class _Batch(object):
+    """
+    Devices of one tag and action waiting to be sent
+    """
+    __slots__ = ('tag_id', 'items', 'timer')
+
+    def __init__(self, tag_id: Any, timer: asyncio.TimerHandle):
+        self.tag_id = tag_id
+        self.items: List[Tuple[Any, asyncio.Future]] = []
+        self.timer = timer
+
+
+class TagBatcher(object):
+    """
+    Collects single device add/remove calls of the async methods
+    and sends them as one request per tag and action
+
+    A batch is sent `window` seconds after its first device, or as
+    soon as it holds max_batch devices. Every caller gets the part of
+    the response concerning its device (AcceptedItems, FailedItems
+    and the Faults of the device), or the exception of the request.
+    Batches are collected per event loop. A batch is only sent after
+    the batches of the opposite action of the same tag submitted before
+    it are answered, so an add and a remove of the same device keep
+    their order. Batches of the same action are sent concurrently.
+    The counters are available in `stats`:
+    calls (devices submitted) and requests (batches sent).
+    """
+
+    def __init__(self, tags: 'Tags', window: float = 0.05, max_batch: int = DEFAULT_PAGE_SIZE):  # noqa: E501
+        """
+        :param tags: Tags object used to send the batches
+        :param window: seconds a batch waits for more devices
+        :param max_batch: maximum number of devices per request
+        """
+        self.tags = tags
+        self.window = window
+        self.max_batch = max_batch
+        self.stats: Dict[str, int] = {"calls": 0, "requests": 0}
+        self._batches: Dict[Tuple[asyncio.AbstractEventLoop, str, str], _Batch] = {}  # noqa: E501
+        self._tasks: Set[asyncio.Task] = set()
+        # batches in flight per event loop, action and tag
+        self._sending: Dict[Tuple[asyncio.AbstractEventLoop, str, str], Set[asyncio.Task]] = {}  # noqa: E501
+
+    async def submit(self, action: str, tag_id: Any, device_id: Any) -> RestResponseType:  # noqa: E501
+        """
+        Adds a device to the batch of the tag and action ('adddevices'
+        or 'removedevices') and returns its part of the response
+        """
+        loop = asyncio.get_running_loop()
+        self._flush((loop, _opposite(action), str(tag_id)))
+        key = (loop, action, str(tag_id))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(
+                tag_id, loop.call_later(self.window, self._flush, key)
+            )
+        future = loop.create_future()
+        batch.items.append((device_id, future))
+        self.stats["calls"] += 1
+        if len(batch.items) >= self.max_batch:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[asyncio.AbstractEventLoop, str, str]) -> None:  # noqa: E501
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        loop, action, tag = key
+        previous = list(self._sending.get((loop, _opposite(action), tag), ()))  # noqa: E501
+        task = loop.create_task(self._send(action, batch, previous))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._sending.setdefault(key, set()).add(task)
+        task.add_done_callback(lambda done: self._sent(key, done))
+
+    def _sent(self, key: Tuple[asyncio.AbstractEventLoop, str, str], task: asyncio.Task) -> None:  # noqa: E501
+        tasks = self._sending.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._sending[key]
+
+    async def _send(self, action: str, batch: _Batch, previous: List[asyncio.Task]) -> None:  # noqa: E501
+        if previous:
+            # the opposite action of the same tag submitted before
+            await asyncio.wait(previous)
+        # a device submitted twice is sent once
+        device_ids = list(dict.fromkeys(device_id for device_id, _ in batch.items))  # noqa: E501
+        self.stats["requests"] += 1
+        try:
+            response = await self.tags._post_devices_async(action, batch.tag_id, device_ids)  # noqa: E501
+        except BaseException as error:
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(error)
+            if not isinstance(error, Exception):
+                raise
+            return
+        accepted = {str(device_id) for device_id in _accepted_ids(device_ids, response)}  # noqa: E501
+        for device_id, future in batch.items:
+            if not future.done():
+                future.set_result(_device_response(device_id, accepted, response))  # noqa: E501
+
+    async def flush(self) -> None:
+        """
+        Sends the pending batches of the running event loop
+        and waits until all batches in flight are answered
+        """
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self._batches if key[0] is loop]:
+            self._flush(key)
+        tasks = [task for task in self._tasks if task.get_loop() is loop]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 class Tags(MDM):
@@ -17,6 +408,8 @@ class Tags(MDM):
 
     def __init__(self, client: Client):
         MDM.__init__(self, client)
+        self.membership: Union[TagMembershipIndex, None] = None
+        self.batcher: Union[TagBatcher, None] = None
 
     def add_device_tag(self, tag_id: int, device_id: str) -> RestResponseType:  # noqa: E501
         """Add a tag to a given device
@@ -26,15 +419,7 @@ class Tags(MDM):
         :return: Status of the executed command (Accepted/Failed) as json
         :rtype: Union[dict, int]
         """
-        path = f'/tags/{str(tag_id)}/adddevices'
-        device_to_add = {
-            "BulkValues": {
-                "Value": [
-                    device_id
-                ]
-            }
-        }
-        return self._post(path=path, json=device_to_add)
+        return self._post_devices('adddevices', tag_id, [device_id])
 
     async def add_device_tag_async(self, tag_id: int, device_id: str) -> RestResponseType:  # noqa: E501
         """Add a tag to a given device
@@ -44,15 +429,9 @@ class Tags(MDM):
         :return: Status of the executed command (Accepted/Failed) as json
         :rtype: Union[dict, int]
         """
-        path = f'/tags/{str(tag_id)}/adddevices'
-        device_to_add = {
-            "BulkValues": {
-                "Value": [
-                    device_id
-                ]
-            }
-        }
-        return await self._async_post(path=path, json=device_to_add)
+        if self.batcher is not None:
+            return await self.batcher.submit('adddevices', tag_id, device_id)
+        return await self._post_devices_async('adddevices', tag_id, [device_id])  # noqa: E501
 
     def remove_device_tag(self, tag_id: int, device_id: str) -> RestResponseType:  # noqa: E501
         """Remove a tag from a given device
@@ -62,15 +441,7 @@ class Tags(MDM):
         :return: Status of the executed command (Accepted/Failed) as json
         :rtype: Union[dict, int]
         """
-        path = f'/tags/{tag_id}/removedevices'
-        device_to_add = {
-            "BulkValues": {
-                "Value": [
-                    device_id
-                ]
-            }
-        }
-        return self._post(path=path, json=device_to_add)
+        return self._post_devices('removedevices', tag_id, [device_id])
 
     async def remove_device_tag_async(self, tag_id: int, device_id: str) -> RestResponseType:  # noqa: E501
         """Remove a tag from a given device
@@ -80,15 +451,84 @@ class Tags(MDM):
         :return: Status of the executed command (Accepted/Failed) as json
         :rtype: Union[dict, int]
         """
-        path = f'/tags/{tag_id}/removedevices'
-        device_to_add = {
-            "BulkValues": {
-                "Value": [
-                    device_id
-                ]
-            }
-        }
-        return await self._async_post(path=path, json=device_to_add)
+        if self.batcher is not None:
+            return await self.batcher.submit('removedevices', tag_id, device_id)  # noqa: E501
+        return await self._post_devices_async('removedevices', tag_id, [device_id])  # noqa: E501
+
+    def enable_batching(self, window: float = 0.05, max_batch: int = DEFAULT_PAGE_SIZE) -> TagBatcher:  # noqa: E501
+        """
+        Collects the calls of add_device_tag_async and
+        remove_device_tag_async into one request per tag and action,
+        see TagBatcher.
+
+        :param window: seconds a batch waits for more devices
+        :param max_batch: maximum number of devices per request
+        :return: the batcher
+        """
+        self.batcher = TagBatcher(self, window=window, max_batch=max_batch)
+        return self.batcher
+
+    def enable_membership_index(self, ttl: float = 300.0) -> TagMembershipIndex:  # noqa: E501
+        """
+        Answers check_device_tag and check_devices_tag from an index
+        of the devices of every tag, reloaded after ttl seconds.
+
+        :param ttl: seconds the devices of a tag are used before reloading
+        :return: the index
+        """
+        self.membership = TagMembershipIndex(ttl=ttl)
+        return self.membership
+
+    def get_tag_devices(self, tag_id: int) -> RestResponseType:
+        """
+        Returns the devices the given tag is assigned to
+
+        :param str tag_id: The ID of the Tag in WorkspaceOneUEM
+        :return: API response with the Device list
+        :rtype: Union[dict, int]
+        """
+        return self._get(path=f'tags/{tag_id}/devices')
+
+    async def get_tag_devices_async(self, tag_id: int) -> RestResponseType:
+        """
+        The same as get_tag_devices but async.
+        """
+        return await self._async_get(path=f'tags/{tag_id}/devices')
+
+    def _fetch_tag_devices(self, tag_id: int) -> List[Dict[str, Any]]:
+        """
+        Returns the devices of the tag, raises WorkspaceOneAPIError
+        if the request failed (an empty tag answers 204)
+        """
+        return _tag_devices(_raise_for_status(self.get_tag_devices(tag_id)))
+
+    async def _fetch_tag_devices_async(self, tag_id: int) -> List[Dict[str, Any]]:  # noqa: E501
+        return _tag_devices(_raise_for_status(await self.get_tag_devices_async(tag_id)))  # noqa: E501
+
+    def _membership(self, tag_id: int) -> TagMembershipIndex:
+        """
+        Returns the membership index with the devices of the tag loaded
+        """
+        if self.membership.is_fresh(tag_id):
+            self.membership.stats["hits"] += 1
+        else:
+            self.membership.stats["misses"] += 1
+            self.membership.load(tag_id, self._fetch_tag_devices(tag_id))
+        return self.membership
+
+    async def _membership_async(self, tag_id: int) -> TagMembershipIndex:
+        if self.membership.is_fresh(tag_id):
+            self.membership.stats["hits"] += 1
+        else:
+            self.membership.stats["misses"] += 1
+            self.membership.load(tag_id, await self._fetch_tag_devices_async(tag_id))  # noqa: E501
+        return self.membership
+
+    @staticmethod
+    def _check_devices(tag_id: int, index: TagMembershipIndex, device_ids: Iterable[Any], device_uuids: Iterable[Any]) -> Dict[str, bool]:  # noqa: E501
+        result = {str(device_id): index.contains(tag_id, device_id=device_id) for device_id in device_ids}  # noqa: E501
+        result.update({str(device_uuid): index.contains(tag_id, device_uuid=device_uuid) for device_uuid in device_uuids})  # noqa: E501
+        return result
 
     def check_device_tag(
         self,
@@ -111,24 +551,11 @@ class Tags(MDM):
         :return: True if the tag is assigned / False if not
         :rtype: bool
         """
-        path = f'tags/{tag_id}/devices'
-        response = self._get(path=path)
-        if (
-            response and
-            isinstance(response, dict) and
-            'Device' in response and
-            isinstance(response['Device'], list)
-        ):
-            for device in response['Device']:
-                if (
-                    isinstance(device, dict) and
-                    (
-                        str(device['DeviceId']) == str(device_id)
-                        or str(device['DeviceUuid']) == str(device_uuid)
-                    )
-                ):
-                    return True
-        return False
+        if self.membership is not None:
+            return self._membership(tag_id).contains(tag_id, device_id, device_uuid)  # noqa: E501
+        index = TagMembershipIndex()
+        index.load(tag_id, self._fetch_tag_devices(tag_id))
+        return index.contains(tag_id, device_id, device_uuid)
 
     async def check_device_tag_async(
         self,
@@ -137,35 +564,236 @@ class Tags(MDM):
         device_uuid: str = ""
     ) -> bool:
         """
-        Get a list of devices for the given tags
-        and check if a specific device, defined by it's UUID,
-        has the tag already assigned
+        The same as check_device_tag but async.
+        """
+        if self.membership is not None:
+            return (await self._membership_async(tag_id)).contains(tag_id, device_id, device_uuid)  # noqa: E501
+        index = TagMembershipIndex()
+        index.load(tag_id, await self._fetch_tag_devices_async(tag_id))
+        return index.contains(tag_id, device_id, device_uuid)
+
+    def check_devices_tag(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any] = (),
+        device_uuids: Iterable[Any] = ()
+    ) -> Dict[str, bool]:
+        """
+        Checks for many devices if the tag is assigned,
+        with one download of the devices of the tag at most
 
         :param str tag_id: The ID of the Tag in WorkspaceOneUEM
-        :param str device_id (optional):
-            The DeviceID of the Device in WorkspaceOneUEM.
-            Defaults to None.
-        :param str device_uuid (optional):
-            The UUID of the Device in WorkspaceOneUEM.
-            Defaults to None.
-        :return: True if the tag is assigned / False if not
-        :rtype: bool
+        :param device_ids: DeviceIDs of the Devices
+        :param device_uuids: UUIDs of the Devices
+        :return: True / False per given DeviceID and UUID
+        :rtype: dict
+        """
+        if self.membership is not None:
+            index = self._membership(tag_id)
+        else:
+            index = TagMembershipIndex()
+            index.load(tag_id, self._fetch_tag_devices(tag_id))
+        return self._check_devices(tag_id, index, device_ids, device_uuids)
+
+    async def check_devices_tag_async(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any] = (),
+        device_uuids: Iterable[Any] = ()
+    ) -> Dict[str, bool]:
         """
-        path = f'tags/{tag_id}/devices'
-        response = await self._async_get(path=path)
-        if (
-            response and
-            isinstance(response, dict) and
-            'Device' in response and
-            isinstance(response['Device'], list)
+        The same as check_devices_tag but async.
+        """
+        if self.membership is not None:
+            index = await self._membership_async(tag_id)
+        else:
+            index = TagMembershipIndex()
+            index.load(tag_id, await self._fetch_tag_devices_async(tag_id))
+        return self._check_devices(tag_id, index, device_ids, device_uuids)
+
+    def _post_devices(self, action: str, tag_id: int, device_ids: List[Any]) -> RestResponseType:  # noqa: E501
+        path = f'/tags/{tag_id}/{action}'
+        response = self._post(path=path, json={"BulkValues": {"Value": device_ids}}, idempotent=True)  # noqa: E501
+        self._update_membership(action, tag_id, device_ids, response)
+        return response
+
+    async def _post_devices_async(self, action: str, tag_id: int, device_ids: List[Any]) -> RestResponseType:  # noqa: E501
+        path = f'/tags/{tag_id}/{action}'
+        response = await self._async_post(path=path, json={"BulkValues": {"Value": device_ids}}, idempotent=True)  # noqa: E501
+        self._update_membership(action, tag_id, device_ids, response)
+        return response
+
+    def _update_membership(self, action: str, tag_id: int, device_ids: List[Any], response: RestResponseType) -> None:  # noqa: E501
+        """
+        Applies an accepted add/remove to the membership index
+        """
+        if self.membership is None:
+            return
+        accepted = _accepted_ids(device_ids, response)
+        if action == 'adddevices':
+            self.membership.add(tag_id, accepted)
+        else:
+            self.membership.remove(tag_id, accepted)
+
+    def _bulk(self, action: str, tag_id: int, device_ids: Iterable[Any], chunk_size: int, concurrency: int) -> TagBulkResult:  # noqa: E501
+        result = TagBulkResult()
+        for chunk_result in map_threaded(
+            lambda chunk: self._post_devices(action, tag_id, chunk),
+            _chunks(device_ids, chunk_size),
+            concurrency=concurrency,
+            ordered=False
+        ):
+            result.add(chunk_result)
+        return result
+
+    async def _bulk_async(self, action: str, tag_id: int, device_ids: Iterable[Any], chunk_size: int, concurrency: int) -> TagBulkResult:  # noqa: E501
+        result = TagBulkResult()
+        async for chunk_result in map_async(
+            lambda chunk: self._post_devices_async(action, tag_id, chunk),
+            _chunks(device_ids, chunk_size),
+            concurrency=concurrency,
+            ordered=False
         ):
-            for device in response['Device']:
-                if (
-                    isinstance(device, dict) and
-                    (
-                        str(device['DeviceId']) == str(device_id)
-                        or str(device['DeviceUuid']) == str(device_uuid)
-                    )
-                ):
-                    return True
-        return False
+            result.add(chunk_result)
+        return result
+
+    def add_devices(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any],
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagBulkResult:
+        """Add a tag to many devices
+
+        The devices are sent in chunks of chunk_size device ids,
+        with at most `concurrency` requests in flight.
+
+        :param str tag_id: The ID of the Tag in WorkspaceOneUEM
+        :param device_ids: The IDs of the Devices in WorkspaceOneUEM
+        :param int chunk_size: device ids per request
+        :param int concurrency: maximum number of requests in flight
+        :return: combined Accepted/Failed counts of all chunks
+        :rtype: TagBulkResult
+        """
+        return self._bulk('adddevices', tag_id, device_ids, chunk_size, concurrency)  # noqa: E501
+
+    async def add_devices_async(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any],
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagBulkResult:
+        """
+        The same as add_devices but async.
+        """
+        return await self._bulk_async('adddevices', tag_id, device_ids, chunk_size, concurrency)  # noqa: E501
+
+    def remove_devices(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any],
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagBulkResult:
+        """Remove a tag from many devices
+
+        See add_devices for the chunking.
+
+        :param str tag_id: The ID of the Tag in WorkspaceOneUEM
+        :param device_ids: The IDs of the Devices in WorkspaceOneUEM
+        :param int chunk_size: device ids per request
+        :param int concurrency: maximum number of requests in flight
+        :return: combined Accepted/Failed counts of all chunks
+        :rtype: TagBulkResult
+        """
+        return self._bulk('removedevices', tag_id, device_ids, chunk_size, concurrency)  # noqa: E501
+
+    async def remove_devices_async(
+        self,
+        tag_id: int,
+        device_ids: Iterable[Any],
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagBulkResult:
+        """
+        The same as remove_devices but async.
+        """
+        return await self._bulk_async('removedevices', tag_id, device_ids, chunk_size, concurrency)  # noqa: E501
+
+    def _current_devices(self, tag_id: int) -> List[Dict[str, Any]]:
+        devices = self._fetch_tag_devices(tag_id)
+        if self.membership is not None:
+            self.membership.load(tag_id, devices)
+        return devices
+
+    async def _current_devices_async(self, tag_id: int) -> List[Dict[str, Any]]:  # noqa: E501
+        devices = await self._fetch_tag_devices_async(tag_id)
+        if self.membership is not None:
+            self.membership.load(tag_id, devices)
+        return devices
+
+    def reconcile(
+        self,
+        tag_id: int,
+        desired_device_ids: Iterable[Any],
+        dry_run: bool = False,
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagReconcileResult:
+        """Brings the devices of a tag to the desired state
+
+        The devices of the tag are downloaded once, only the devices
+        missing the tag are added and only the devices not desired
+        are removed, with chunked requests (see add_devices).
+
+        :param str tag_id: The ID of the Tag in WorkspaceOneUEM
+        :param desired_device_ids: IDs of the Devices which should
+                                   have the tag, all others lose it
+        :param bool dry_run: only compute the changes, send nothing
+        :param int chunk_size: device ids per request
+        :param int concurrency: maximum number of requests in flight
+        :return: the changes, the add/remove results and the timings
+        :rtype: TagReconcileResult
+        :raises WorkspaceOneAPIError: if the devices of the tag cannot be
+                                      requested, nothing is sent
+        """
+        started = time.monotonic()
+        result = TagReconcileResult(dry_run)
+        result.diff(self._current_devices(tag_id), desired_device_ids)
+        result.seconds["fetch"] = time.monotonic() - started
+        if not dry_run:
+            step = time.monotonic()
+            result.added = self.add_devices(tag_id, result.to_add, chunk_size, concurrency)  # noqa: E501
+            result.seconds["add"] = time.monotonic() - step
+            step = time.monotonic()
+            result.removed = self.remove_devices(tag_id, result.to_remove, chunk_size, concurrency)  # noqa: E501
+            result.seconds["remove"] = time.monotonic() - step
+        result.seconds["total"] = time.monotonic() - started
+        return result
+
+    async def reconcile_async(
+        self,
+        tag_id: int,
+        desired_device_ids: Iterable[Any],
+        dry_run: bool = False,
+        chunk_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = 4
+    ) -> TagReconcileResult:
+        """
+        The same as reconcile but async.
+        """
+        started = time.monotonic()
+        result = TagReconcileResult(dry_run)
+        result.diff(await self._current_devices_async(tag_id), desired_device_ids)  # noqa: E501
+        result.seconds["fetch"] = time.monotonic() - started
+        if not dry_run:
+            step = time.monotonic()
+            result.added = await self.add_devices_async(tag_id, result.to_add, chunk_size, concurrency)  # noqa: E501
+            result.seconds["add"] = time.monotonic() - step
+            step = time.monotonic()
+            result.removed = await self.remove_devices_async(tag_id, result.to_remove, chunk_size, concurrency)  # noqa: E501
+            result.seconds["remove"] = time.monotonic() - step
+        result.seconds["total"] = time.monotonic() - started
+        return result
@@ -0,0 +1,139 @@
+"""
+Rate Limit Module
+
+Implements a token bucket rate limiter that paces the requests of a
+Client before the UEM API starts to throttle them.
+
+The limiter adapts its rate to the rate limit headers returned by the
+API (X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset) and
+pauses all requests when a response with status 429 carries
+a Retry-After header.
+It is thread-safe and shared by the sync and async request methods.
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Dict, Union
+from httpx import Response
+
+
+def parse_retry_after(value: Union[str, None]) -> Union[float, None]:
+    """
+    Returns the seconds to wait for a Retry-After header value,
+    given either in seconds or as HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())  # noqa: E501
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter
+
+    Allows bursts of up to `burst` requests and refills `rate` tokens
+    per second. The rate is lowered to what the remaining quota of the
+    current rate limit window allows, but never raised above the
+    configured rate. A 429 response halves the rate, which then
+    recovers slowly with every successful response.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 10, min_rate: float = 0.1):  # noqa: E501
+        """
+        Initialize the RateLimiter
+
+        :param rate: maximum requests per second
+        :param burst: maximum number of requests sent without pacing
+        :param min_rate: lower bound the rate is never adjusted below
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.stats: Dict[str, int] = {"requests": 0, "delayed": 0, "throttled": 0}  # noqa: E501
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = Lock()
+
+    def _reserve(self) -> float:
+        """
+        Takes a token from the bucket and returns the seconds
+        the caller has to wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._blocked_until - now)  # noqa: E501
+            self.stats["requests"] += 1
+            if delay > 0:
+                self.stats["delayed"] += 1
+            return delay
+
+    def acquire(self) -> None:
+        """
+        Blocks until the next request may be sent
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_acquire(self) -> None:
+        """
+        The same as acquire but async.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, response: Response) -> None:
+        """
+        Adjusts the rate to the rate limit headers of a response
+        """
+        headers = response.headers
+        now = time.monotonic()
+        with self._lock:
+            if response.status_code == 429:
+                self.stats["throttled"] += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                if retry_after is not None:
+                    self._blocked_until = max(self._blocked_until, now + retry_after)  # noqa: E501
+                    self._tokens = min(self._tokens, 0.0)
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset")
+            if remaining is None or reset is None:
+                if response.status_code != 429:
+                    # slowly recover from a rate lowered after a 429
+                    self.rate = min(self.max_rate, self.rate * 1.05)
+                return
+            try:
+                remaining_requests = int(remaining)
+                reset_in = float(reset)
+            except ValueError:
+                return
+            if reset_in > 1e9:
+                # reset given as unix timestamp
+                reset_in -= time.time()
+            if reset_in <= 0:
+                return
+            if remaining_requests <= 0:
+                self._blocked_until = max(self._blocked_until, now + reset_in)  # noqa: E501
+                self._tokens = min(self._tokens, 0.0)
+                return
+            self.rate = min(self.max_rate, max(self.min_rate, remaining_requests / reset_in))  # noqa: E501
+            self._tokens = min(self._tokens, float(remaining_requests))
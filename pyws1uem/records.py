@@ -0,0 +1,124 @@
+"""
+Records Module
+
+Compact representation of device records for large fleet snapshots.
+
+The search endpoints return every device as a nested dict, repeating
+all key strings and the same few values (platform, model, OS version,
+organization group) in every record. DeviceRecord keeps a fixed set of
+fields in __slots__ and interns the repeated values, so a snapshot of
+many devices shares one copy of every distinct string.
+"""
+
+import sys
+from typing import Any, Dict, Tuple
+
+# record field -> keys of the field in the responses of the
+# v1/v2/v3 search, the extensive search and the smartgroup devices,
+# compared case-insensitive and without underscores
+_FIELD_KEYS: Dict[str, Tuple[str, ...]] = {
+    "id": ("id", "deviceid"),
+    "uuid": ("uuid", "deviceuuid"),
+    "serial_number": ("serialnumber",),
+    "mac_address": ("macaddress", "wifimacaddress"),
+    "udid": ("udid",),
+    "imei": ("imei", "imeinumber"),
+    "eas_id": ("easid",),
+    "device_name": (
+        "devicefriendlyname", "friendlyname", "devicename", "name"
+    ),
+    "user_name": ("username", "enrollmentusername"),
+    "platform": ("platform", "platformname", "devicetype"),
+    "model": ("model", "modelname", "modelidentifier"),
+    "os_version": ("operatingsystem", "osversion"),
+    "og_id": ("locationgroupid", "organizationgroupid"),
+    "og_name": ("locationgroupname", "organizationgroupname"),
+    "ownership": ("ownership", "ownershiptype"),
+    "enrollment_status": ("enrollmentstatus",),
+    "compliance_status": ("compliancestatus",),
+    "last_seen": ("lastseen", "lastseentime"),
+}
+
+# fields with few distinct values across a fleet
+_INTERNED = frozenset((
+    "platform", "model", "os_version", "og_name",
+    "ownership", "enrollment_status", "compliance_status",
+))
+
+
+def _scalar(value: Any) -> Any:
+    """
+    Unwraps the id objects of the API, e.g. {"Value": 1} or
+    {"Id": {"Value": 1}, "Name": "OG"} -> 1
+    """
+    while isinstance(value, dict):
+        if "Value" in value:
+            value = value["Value"]
+        elif "Id" in value:
+            value = value["Id"]
+        else:
+            return None
+    return value
+
+
+class DeviceRecord(object):
+    """
+    Compact device record with a fixed set of fields
+
+    Fields missing in the source dict are None.
+    """
+    __slots__ = tuple(_FIELD_KEYS)
+
+    def __init__(self, **fields: Any):
+        for field in self.__slots__:
+            value = fields.pop(field, None)
+            if field in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        if fields:
+            raise TypeError(f'Unknown DeviceRecord fields: {", ".join(fields)}')  # noqa: E501
+
+    @classmethod
+    def from_dict(cls, device: Dict[str, Any]) -> "DeviceRecord":
+        """
+        Creates a record from a device dict of the search endpoints,
+        unknown keys are ignored
+        """
+        keys = {
+            key.lower().replace("_", ""): value
+            for key, value in device.items()
+        }
+        fields = {}
+        for field, aliases in _FIELD_KEYS.items():
+            for alias in aliases:
+                value = keys.get(alias)
+                if value is not None:
+                    fields[field] = _scalar(value)
+                    break
+        location_group = keys.get("locationgroupid")
+        if "og_name" not in fields and isinstance(location_group, dict):
+            fields["og_name"] = location_group.get("Name")
+        return cls(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the fields of the record as dict
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, DeviceRecord):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in self.__slots__
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def __repr__(self) -> str:
+        return f'DeviceRecord(id={self.id!r}, serial_number={self.serial_number!r}, device_name={self.device_name!r})'  # noqa: E501
@@ -6,10 +6,77 @@ correctly connect to /mdm API Endpoints
 """
 
 
-from typing import Any, Dict
-from pyws1uem.client import Client, _Params, RestResponseType
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Tuple, Union  # noqa: E501
+from pyws1uem.client import Client, _Params, RestResponseType, _raise_for_status  # noqa: E501
+from pyws1uem.stream import JsonArrayStream
 from httpx import Response
 
+DEFAULT_PAGE_SIZE = 500
+
+
+def _page_total(response: Dict[str, Any]) -> Union[int, None]:
+    """
+    Returns the total count reported by a paged response
+    """
+    for total_key in ('Total', 'TotalResults', 'total'):
+        total = response.get(total_key)
+        if isinstance(total, int):
+            return total
+    return None
+
+
+def _page_size(response: Dict[str, Any]) -> Union[int, None]:
+    """
+    Returns the page size reported by a paged response,
+    the API may use a smaller page size than requested
+    """
+    for size_key in ('PageSize', 'pagesize', 'page_size'):
+        size = response.get(size_key)
+        if isinstance(size, int) and size > 0:
+            return size
+    return None
+
+
+def _page_items(response: RestResponseType, items_key: str) -> Tuple[List[Any], Dict[str, Any]]:  # noqa: E501
+    """
+    Returns the items of a paged response and the response itself
+    (for the paging information, empty if there are no items).
+    Empty searches are answered with 204 (no json) by the API,
+    other responses without json are errors and raise.
+    """
+    if not isinstance(_raise_for_status(response), dict):
+        return [], {}
+    items = response.get(items_key)
+    if not isinstance(items, list):
+        return [], {}
+    return items, response
+
+
+def _next_page(page: int, page_size: int, count: int, meta: Dict[str, Any]) -> Tuple[bool, int]:  # noqa: E501
+    """
+    Checks if the page with `count` (> 0) items was the last page and
+    returns the page size the API used for it.
+
+    The API may cap the requested page size. The size used is taken
+    from the PageSize of the response or, without it, from a short
+    page below the reported total. With a total, only the total ends
+    the walk (or an empty page). Without a total, a page with more or
+    fewer items than the page size is the last page, more items means
+    that the endpoint ignores the paging parameters and returned all
+    items at once.
+    """
+    total = _page_total(meta)
+    reported = _page_size(meta)
+    if reported is not None:
+        page_size = reported
+    if total is None:
+        return count != page_size, page_size
+    if reported is None and count < page_size and page * page_size + count < total:  # noqa: E501
+        page_size = count
+    return page * page_size + count >= total, page_size
+
 
 class Rest(object):
     """
@@ -44,7 +111,8 @@ class Rest(object):
         params: _Params = {},
         data: Any = None,
         json: Any = None,
-        header: Dict[str, str] = {}
+        header: Dict[str, str] = {},
+        idempotent: bool = False
     ) -> RestResponseType:
         """POST requests for base endpoints"""
         return self.client.post(
@@ -54,7 +122,8 @@ class Rest(object):
             params=params,
             data=data,
             json=json,
-            header=header
+            header=header,
+            idempotent=idempotent
         )
 
     def _post_no_error_check(
@@ -138,10 +207,165 @@ class Rest(object):
             header=header
         )
 
+    def _iter_pages(
+        self,
+        path: str = "",
+        items_key: str = "Devices",
+        version: str = "",
+        params: Dict[str, Any] = {},
+        header: Dict[str, str] = {},
+        stream: bool = False,
+        item_factory: Union[Callable[[Any], Any], None] = None
+    ) -> Iterator[Any]:
+        """
+        GET requests for paged endpoints.
+        Yields the items of the `items_key` list page by page,
+        starting at the `page` param (default 0) with `pagesize`
+        items per page (default 500), until the reported total
+        (or without a total, a short page) is reached.
+        The pages are advanced with the page size used by the API.
+        Only one page is held in memory at a time, with stream
+        the pages are decoded incrementally and only one item is.
+        With item_factory, every item is converted before it is yielded
+        (e.g. DeviceRecord.from_dict).
+        """
+        _params = dict(params)
+        page = int(_params.pop('page', 0))
+        page_size = int(_params.pop('pagesize', DEFAULT_PAGE_SIZE))
+        while True:
+            _params.update({'page': page, 'pagesize': page_size})
+            if stream:
+                page_stream = self._stream_get(path=path, items_key=items_key, version=version, params=_params, header=header)  # noqa: E501
+                count = 0
+                for item in page_stream:
+                    count += 1
+                    yield item if item_factory is None else item_factory(item)  # noqa: E501
+                meta = page_stream.meta
+            else:
+                response = self._get(path=path, version=version, params=_params, header=header)  # noqa: E501
+                items, meta = _page_items(response, items_key)
+                count = len(items)
+                yield from items if item_factory is None else map(item_factory, items)  # noqa: E501
+            if not count:
+                return
+            last, page_size = _next_page(page, page_size, count, meta)
+            if last:
+                return
+            page += 1
+
+    def _stream_get(
+        self,
+        path: str = "",
+        items_key: str = "Devices",
+        version: str = "",
+        params: _Params = {},
+        header: Dict[str, str] = {}
+    ) -> JsonArrayStream:
+        """
+        GET requests decoding the `items_key` list incrementally
+        """
+        return self.client.stream_get(
+            module=self._module,
+            path=path,
+            items_key=items_key,
+            version=version,
+            params=params,
+            header=header
+        )
+
     # ----------------------------------------------------------------
     # Async methods
     # ----------------------------------------------------------------
 
+    async def _async_iter_pages(
+        self,
+        path: str = "",
+        items_key: str = "Devices",
+        version: str = "",
+        params: Dict[str, Any] = {},
+        header: Dict[str, str] = {},
+        prefetch: int = 0,
+        stream: bool = False,
+        item_factory: Union[Callable[[Any], Any], None] = None
+    ) -> AsyncIterator[Any]:
+        """
+        The same as _iter_pages but async.
+
+        With prefetch > 0, the remaining pages are requested concurrently
+        as soon as the first page reports the total count (planned with
+        the PageSize reported by that page, if any), with at most
+        `prefetch` pages in flight or buffered at a time.
+        The items are still yielded in page order.
+        With stream, the pages requested one after another
+        are decoded incrementally (prefetched pages are not).
+        """
+        _params = dict(params)
+        page = int(_params.pop('page', 0))
+        page_size = int(_params.pop('pagesize', DEFAULT_PAGE_SIZE))
+        while True:
+            _params.update({'page': page, 'pagesize': page_size})
+            if stream:
+                page_stream = self._async_stream_get(path=path, items_key=items_key, version=version, params=_params, header=header)  # noqa: E501
+                count = 0
+                async for item in page_stream:
+                    count += 1
+                    yield item if item_factory is None else item_factory(item)  # noqa: E501
+                meta = page_stream.meta
+            else:
+                response = await self._async_get(path=path, version=version, params=_params, header=header)  # noqa: E501
+                items, meta = _page_items(response, items_key)
+                count = len(items)
+                for item in items:
+                    yield item if item_factory is None else item_factory(item)  # noqa: E501
+            if not count:
+                return
+            # the page size used by the API plans the remaining pages
+            last, page_size = _next_page(page, page_size, count, meta)
+            if last:
+                return
+            page += 1
+            total = _page_total(meta)
+            if prefetch > 0 and total is not None:
+                break
+        last_page = (total - 1) // page_size
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            while pending or page <= last_page:
+                while page <= last_page and len(pending) < prefetch:
+                    pending.append(asyncio.ensure_future(self._async_get(
+                        path=path,
+                        version=version,
+                        params={**_params, 'page': page, 'pagesize': page_size},  # noqa: E501
+                        header=header
+                    )))
+                    page += 1
+                items, _ = _page_items(await pending.popleft(), items_key)
+                for item in items:
+                    yield item if item_factory is None else item_factory(item)  # noqa: E501
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _async_stream_get(
+        self,
+        path: str = "",
+        items_key: str = "Devices",
+        version: str = "",
+        params: _Params = {},
+        header: Dict[str, str] = {}
+    ) -> JsonArrayStream:
+        """
+        The same as _stream_get but async (iterate with async for).
+        """
+        return self.client.async_stream_get(
+            module=self._module,
+            path=path,
+            items_key=items_key,
+            version=version,
+            params=params,
+            header=header
+        )
+
     async def _async_get(
         self,
         path: str = "",
@@ -165,7 +389,8 @@ class Rest(object):
         params: _Params = {},
         data: Any = None,
         json: Any = None,
-        header: Dict[str, str] = {}
+        header: Dict[str, str] = {},
+        idempotent: bool = False
     ) -> RestResponseType:
         """POST requests for base endpoints"""
         return await self.client.async_post(
@@ -175,7 +400,8 @@ class Rest(object):
             params=params,
             data=data,
             json=json,
-            header=header
+            header=header,
+            idempotent=idempotent
         )
 
     async def _async_post_no_error_check(
@@ -0,0 +1,121 @@
+"""
+Retry Module
+
+Defines the retry policy a Client applies to failed requests:
+capped exponential backoff with jitter, a total time budget per call
+and awareness of which requests are safe to repeat.
+"""
+
+import random
+import time
+from collections import Counter
+from typing import Iterable, Union
+from httpx import ConnectError, ConnectTimeout, PoolTimeout, Response, TransportError  # noqa: E501
+
+from pyws1uem.ratelimit import parse_retry_after
+
+# failures of requests that never reached the server,
+# these are safe to repeat for every method
+_UNSENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+class RetryPolicy(object):
+    """
+    Retry policy for the requests of a Client
+
+    GET, PUT and DELETE requests (and every other method in
+    allowed_methods) are retried on transport errors and on the status
+    codes in status_forcelist. POST requests are only retried when
+    the caller marks them as idempotent, or when the request
+    provably was not processed (connection failures and 429).
+
+    The counters of the policy are available in `stats`:
+    requests, retries, exhausted and one entry per retry reason
+    (status code or exception name).
+    """
+
+    def __init__(
+        self,
+        total: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30.0,
+        budget: float = 120.0,
+        jitter: bool = True,
+        status_forcelist: Iterable[int] = (429, 500, 502, 503, 504),
+        allowed_methods: Iterable[str] = ("GET", "PUT", "DELETE", "HEAD", "OPTIONS"),  # noqa: E501
+    ):
+        """
+        Initialize the RetryPolicy
+
+        :param total: maximum number of retries per call
+        :param backoff_factor: base delay, the n-th retry waits
+                               backoff_factor * 2 ** n seconds
+        :param backoff_max: upper bound of a single delay
+        :param budget: total seconds a call (including retries) may take
+        :param jitter: randomize the delays (full jitter)
+        :param status_forcelist: status codes that are retried
+        :param allowed_methods: methods that are retried automatically
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.budget = budget
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.allowed_methods = frozenset(method.upper() for method in allowed_methods)  # noqa: E501
+        self.stats: Counter = Counter()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the delay before the retry number `attempt` (0 based)
+        """
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def next_delay(
+        self,
+        method: str,
+        attempt: int,
+        started: float,
+        idempotent: bool = False,
+        response: Union[Response, None] = None,
+        error: Union[TransportError, None] = None
+    ) -> Union[float, None]:
+        """
+        Decides if a failed attempt is retried.
+
+        :param method: HTTP method of the request
+        :param attempt: number of retries done so far
+        :param started: time.monotonic() at the start of the call
+        :param idempotent: the caller marked the request as safe to repeat
+        :param response: the response of the attempt
+        :param error: the transport error of the attempt
+        :return: seconds to wait before the next attempt
+                 or None if the attempt is not retried
+        """
+        if attempt == 0:
+            self.stats["requests"] += 1
+        if error is not None:
+            reason = type(error).__name__
+            safe = isinstance(error, _UNSENT_ERRORS)
+            retry_after = None
+        elif response is not None and response.status_code in self.status_forcelist:  # noqa: E501
+            reason = str(response.status_code)
+            safe = response.status_code == 429
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))  # noqa: E501
+        else:
+            return None
+        if not (safe or idempotent or method.upper() in self.allowed_methods):
+            return None
+        delay = self.backoff(attempt) if retry_after is None else retry_after
+        if (
+            attempt >= self.total or
+            time.monotonic() - started + delay > self.budget
+        ):
+            self.stats["exhausted"] += 1
+            return None
+        self.stats["retries"] += 1
+        self.stats[reason] += 1
+        return delay
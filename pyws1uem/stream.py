@@ -0,0 +1,192 @@
+"""
+Stream Module
+
+Incremental decoding of large JSON responses.
+
+Paged search responses of the API are JSON objects with one large array
+member (e.g. "Devices") and a few small members (Page, PageSize, Total).
+The decoder in this module parses the body while it is received and
+returns every element of the array as soon as it is complete, so the
+peak memory depends on the size of one element instead of the whole page.
+"""
+
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Union  # noqa: E501
+
+from pyws1uem.error import WorkspaceOneAPIError
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# characters that may follow a complete element of the array
+_ITEM_END = ",] \t\n\r"
+
+
+class ArrayStreamDecoder(object):
+    """
+    Incremental decoder for one array member of a top-level JSON object
+
+    Feed the text of the body chunk by chunk with feed(), which returns
+    the array elements completed by the chunk. close() returns the
+    other members of the object.
+    """
+
+    def __init__(self, key: str):
+        """
+        :param key: name of the array member to decode incrementally
+        """
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._state = "search"
+        self._prefix = ""
+        self._suffix: List[str] = []
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Adds a chunk of the body and returns the completed elements
+        """
+        if self._state == "tail":
+            self._suffix.append(text)
+            return []
+        self._buffer += text
+        if self._state == "search":
+            self._search()
+        if self._state == "items":
+            return self._items(final=False)
+        return []
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finishes the decoding and returns the members of the object
+        besides the array
+        """
+        if self._state == "items":
+            self._items(final=True)
+        if self._state == "search":
+            document = self._buffer
+        elif self._state == "tail":
+            document = f'{self._prefix}{json.dumps(self.key)}: null{"".join(self._suffix)}'  # noqa: E501
+        else:
+            raise ValueError(f'Incomplete JSON array "{self.key}" in response')  # noqa: E501
+        self._buffer = ""
+        self._suffix = []
+        if not document.strip():
+            return {}
+        meta = json.loads(document)
+        if not isinstance(meta, dict):
+            return {}
+        meta.pop(self.key, None)
+        return meta
+
+    def _search(self) -> None:
+        """
+        Scans for the array member on the first level of the object
+        """
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                match = _STRING.match(buffer, pos)
+                if match is None:
+                    break
+                end = _WHITESPACE.match(buffer, match.end()).end()
+                if end >= len(buffer):
+                    break
+                if self._depth == 1 and buffer[end] == ':':
+                    value = _WHITESPACE.match(buffer, end + 1).end()
+                    if value >= len(buffer):
+                        break
+                    if buffer[value] == '[' and json.loads(match.group()) == self.key:  # noqa: E501
+                        self._prefix = buffer[:pos]
+                        self._buffer = buffer[value + 1:]
+                        self._pos = 0
+                        self._state = "items"
+                        return
+                pos = match.end()
+                continue
+            if char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+            pos += 1
+        self._pos = pos
+
+    def _items(self, final: bool) -> List[Any]:
+        """
+        Decodes the complete elements of the array from the buffer
+        """
+        buffer = self._buffer
+        pos = 0
+        items = []
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ',':
+                pos = _WHITESPACE.match(buffer, pos + 1).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                self._state = "tail"
+                self._suffix.append(buffer[pos + 1:])
+                pos = len(buffer)
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            if end >= len(buffer) and not final:
+                # a number at the end of the buffer might be incomplete
+                break
+            if not isinstance(item, (dict, list, str)) and end < len(buffer) and buffer[end] not in _ITEM_END:  # noqa: E501
+                # a number split inside, e.g. "-2500." of "-2500.0"
+                if final:
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, end)  # noqa: E501
+                break
+            items.append(item)
+            pos = end
+        self._buffer = buffer[pos:]
+        return items
+
+
+class JsonArrayStream(object):
+    """
+    Iterable over the elements of one array member of a JSON response,
+    decoded while the response body is received.
+
+    Iterate with `for` over a sync source or with `async for` over an
+    async source. After the iteration, `meta` contains the other members
+    of the response (e.g. Page, PageSize, Total).
+    An error response of the API raises a WorkspaceOneAPIError.
+    """
+
+    def __init__(self, chunks: Union[Iterable[str], AsyncIterable[str]], key: str):  # noqa: E501
+        """
+        :param chunks: text chunks of the response body
+        :param key: name of the array member
+        """
+        self._chunks = chunks
+        self.key = key
+        self.meta: Dict[str, Any] = {}
+
+    def _finish(self, decoder: ArrayStreamDecoder) -> None:
+        self.meta = decoder.close()
+        if self.meta.get("errorCode"):
+            raise WorkspaceOneAPIError(json_response=self.meta)
+
+    def __iter__(self) -> Iterator[Any]:
+        decoder = ArrayStreamDecoder(self.key)
+        for text in self._chunks:
+            yield from decoder.feed(text)
+        self._finish(decoder)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        decoder = ArrayStreamDecoder(self.key)
+        async for text in self._chunks:
+            for item in decoder.feed(text):
+                yield item
+        self._finish(decoder)
@@ -33,5 +33,6 @@ setup(
     ],
     python_requires='>=3.9',
     install_requires=['requests'],
+    extras_require={'http2': ['httpx[http2]']},
     keywords='uem airwatch api',
 )